@@ -0,0 +1,178 @@
+"""Stress server2 checkout/return with 1k concurrent requests and check for oversells.
+
+Every batch is released from its own thread at the same instant, and after
+each phase the catalog's copy counts, the loan ledger and the member
+counters must all still agree.
+
+Usage:
+    python bench_checkout.py [--requests 1000] [--books 20] [--copies 3] [--rounds 10]
+"""
+
+import argparse
+import contextlib
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from server2 import (
+    CATALOG,
+    LOANS,
+    MEMBERS,
+    checkout_book,
+    format_isbn,
+    isbn13,
+    return_book,
+)
+
+
+def fire(pool: ThreadPoolExecutor, calls: list) -> tuple[float, np.ndarray, Counter]:
+    """Run ``calls`` in parallel from a common start, returning wall time,
+    per-request latencies and a count of response statuses."""
+    released = []
+    barrier = threading.Barrier(
+        len(calls), action=lambda: released.append(time.perf_counter())
+    )
+
+    def run(call) -> tuple[float, str]:
+        barrier.wait()
+        start = time.perf_counter()
+        status = call()["status"]
+        return time.perf_counter() - start, status
+
+    # The tools log every call; keep that out of the benchmark output.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results = list(pool.map(run, calls))
+    elapsed = time.perf_counter() - released[0]
+    latencies = np.array([latency for latency, _ in results])
+    return elapsed, latencies, Counter(status for _, status in results)
+
+
+def report(label: str, elapsed: float, latencies: np.ndarray, statuses: Counter):
+    rate = len(latencies) / elapsed if elapsed else float("inf")
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    print(
+        f"  {label:<28} {elapsed * 1000:9.1f} ms  ({rate:,.0f}/s)"
+        f"  p50 {p50:.2f} ms  p99 {p99:.2f} ms"
+    )
+    print(f"    {dict(sorted(statuses.items()))}")
+
+
+def check_invariants(book_ids: list[str], member_ids: list[str]) -> list[str]:
+    """Every lent copy has exactly one loan and every loan one member count."""
+    loans = LOANS.loans()
+    by_book = Counter(loan.book_id for loan in loans)
+    by_member = Counter(loan.member_id for loan in loans)
+    problems = []
+    for book_id in book_ids:
+        book = CATALOG.get(book_id)
+        if not 0 <= book.copies_available <= book.copies_total:
+            problems.append(f"{book_id}: {book.copies_available} copies available")
+        if book.copies_available + by_book[book_id] != book.copies_total:
+            problems.append(
+                f"{book_id}: {book.copies_available} available + "
+                f"{by_book[book_id]} on loan != {book.copies_total} total"
+            )
+    for member_id in member_ids:
+        checked_out = MEMBERS.info(member_id)["books_checked_out"]
+        if checked_out != by_member[member_id]:
+            problems.append(
+                f"{member_id}: counted {checked_out} loans, "
+                f"ledger has {by_member[member_id]}"
+            )
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1_000)
+    parser.add_argument("--books", type=int, default=20)
+    parser.add_argument("--copies", type=int, default=3)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--switch-interval", type=float, default=1e-5)
+    args = parser.parse_args()
+
+    # Switch threads far more often than the default 5 ms to provoke races.
+    sys.setswitchinterval(args.switch_interval)
+    rng = random.Random(42)
+    isbns = [
+        format_isbn(int(isbn))
+        for isbn in isbn13(np.arange(args.books + 2) + 700_000_000)
+    ]
+    hot, cas, *churn = [
+        CATALOG.add(f"Bench Book {i}", "Bench Author", isbn, 2024, args.copies).book_id
+        for i, isbn in enumerate(isbns)
+    ]
+    member_ids = [
+        MEMBERS.register(f"Bench Member {i}", f"bench{i}@example.com")
+        for i in range(max(args.requests, args.members))
+    ]
+    book_ids = [hot, cas, *churn]
+
+    print(f"Checkout stress benchmark ({args.requests:,} parallel requests)")
+    problems = []
+    with ThreadPoolExecutor(max_workers=args.requests) as pool:
+        # Every request wants the same book: exactly ``copies`` may succeed.
+        calls = [lambda m=m: checkout_book(hot, m) for m in member_ids[: args.requests]]
+        elapsed, latencies, statuses = fire(pool, calls)
+        report("checkout one hot book", elapsed, latencies, statuses)
+        if statuses["checked_out"] != min(args.copies, args.requests):
+            problems.append(f"hot book lent {statuses['checked_out']} copies")
+        problems += check_invariants(book_ids, member_ids)
+
+        # All requests read the same version first: only one swap may win.
+        version = CATALOG.get(cas).version
+        calls = [
+            lambda m=m: checkout_book(cas, m, expected_version=version)
+            for m in member_ids[: args.requests]
+        ]
+        elapsed, latencies, statuses = fire(pool, calls)
+        report("compare-and-swap checkout", elapsed, latencies, statuses)
+        if statuses["checked_out"] != 1:
+            problems.append(f"versioned checkout won {statuses['checked_out']} times")
+        problems += check_invariants(book_ids, member_ids)
+
+        # Random checkouts and returns by a small member pool over a few books.
+        churners = member_ids[: args.members]
+        total = Counter()
+        elapsed_total = 0.0
+        all_latencies = []
+        for _ in range(args.rounds):
+            held = [(loan.book_id, loan.member_id) for loan in LOANS.loans()]
+            held = [pair for pair in held if pair[0] in churn]
+            calls = []
+            for _ in range(args.requests):
+                if held and rng.random() < 0.5:
+                    book_id, member_id = rng.choice(held)
+                    calls.append(lambda b=book_id, m=member_id: return_book(b, m))
+                else:
+                    book_id, member_id = rng.choice(churn), rng.choice(churners)
+                    calls.append(lambda b=book_id, m=member_id: checkout_book(b, m))
+            elapsed, latencies, statuses = fire(pool, calls)
+            elapsed_total += elapsed
+            all_latencies.append(latencies)
+            total += statuses
+            problems += check_invariants(book_ids, member_ids)
+        report(
+            f"mixed churn ({args.rounds} rounds)",
+            elapsed_total,
+            np.concatenate(all_latencies),
+            total,
+        )
+
+    if problems:
+        print("Invariant violations:")
+        for problem in problems[:20]:
+            print(f"  {problem}")
+        sys.exit(1)
+    print("  invariants held: no copy oversold, every loan counted once")
+
+
+if __name__ == "__main__":
+    main()
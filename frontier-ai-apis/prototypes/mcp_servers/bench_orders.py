@@ -0,0 +1,97 @@
+"""Benchmark the server3 order book with 100k open limit and stop orders.
+
+Usage:
+    python bench_orders.py [--orders 100000]
+"""
+
+import argparse
+import dataclasses
+import os
+import random
+import time
+
+# Importing server3 opens and seeds the portfolio ledger; keep the real one
+# out of the benchmark.
+os.environ["PORTFOLIO_DB"] = ":memory:"
+
+from server3 import STOCK_DATA, OrderBook, PriceTickStore  # noqa: E402
+
+
+def timed(label: str, count: int, fn) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed else float("inf")
+    print(f"  {label:<28} {elapsed * 1000:9.1f} ms  ({rate:,.0f}/s)")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=100_000)
+    args = parser.parse_args()
+
+    # A huge interval keeps the clock from advancing on its own mid-benchmark.
+    store = PriceTickStore(interval=1e9)
+    for symbol, data in STOCK_DATA.items():
+        store.register(symbol, data["base_price"])
+    book = OrderBook(store)
+    rng = random.Random(42)
+    symbols = list(STOCK_DATA)
+
+    def submit_all() -> None:
+        for _ in range(args.orders):
+            symbol = rng.choice(symbols)
+            base = STOCK_DATA[symbol]["base_price"]
+            side = rng.choice(("buy", "sell"))
+            # Rest every order well away from the price so plain ticks rarely fill.
+            away = base * rng.uniform(0.2, 0.5)
+            if rng.random() < 0.5:
+                price = base - away if side == "buy" else base + away
+                book.submit(symbol, side, "limit", 10, limit_price=price)
+            else:
+                price = base + away if side == "buy" else base - away
+                book.submit(symbol, side, "stop", 10, stop_price=price)
+
+    print(f"Order book benchmark ({args.orders:,} open orders)")
+    timed("submit resting orders", args.orders, submit_all)
+    order_ids = [f"ORD-{i:08d}" for i in range(1, args.orders + 1)]
+
+    timed(
+        "get status by order_id",
+        len(order_ids),
+        lambda: [book.get(order_id) for order_id in order_ids],
+    )
+
+    ticks = 1_000
+    timed(
+        "evaluate ticks (no fills)",
+        ticks,
+        lambda: [store.advance(store.snapshot().tick + 1) for _ in range(ticks)],
+    )
+
+    to_cancel = rng.sample(order_ids, k=len(order_ids) // 10)
+    timed(
+        "cancel 10% of orders",
+        len(to_cancel),
+        lambda: [book.cancel(o) for o in to_cancel],
+    )
+
+    # Feed the book shocked snapshots that sweep through resting prices.
+    fills_before = sum(o.status == "executed" for o in map(book.get, order_ids))
+    snap = store.snapshot()
+    shocked = [
+        dataclasses.replace(snap, prices=snap.prices * (1 + 0.6 * (i / ticks - 0.5)))
+        for i in range(ticks)
+    ]
+    timed(
+        "evaluate ticks (with fills)",
+        ticks,
+        lambda: [book.on_tick(s) for s in shocked],
+    )
+    fills = sum(o.status == "executed" for o in map(book.get, order_ids)) - fills_before
+    print(f"  orders filled on tick: {fills:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Precomputed NYSE trading calendar.
+
+Sessions (regular and early-close days, with US market holidays removed)
+are generated once for a span of years and stored as sorted NumPy arrays,
+so open/closed and next-open/next-close queries are binary searches.
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+EXCHANGE_TIMEZONE = "America/New_York"
+REGULAR_OPEN = time(9, 30)
+REGULAR_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+
+
+def easter_sunday(year: int) -> date:
+    """Gregorian Easter (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    el = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * el) // 451
+    month, day = divmod(h + el - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """The ``n``-th ``weekday`` (Mon=0) of a month; ``n=-1`` means the last."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def observed(day: date) -> date:
+    """Saturday holidays move to Friday, Sunday holidays to Monday."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def nyse_holidays(year: int) -> set[date]:
+    holidays = {
+        nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+        nth_weekday(year, 2, 0, 3),  # Washington's Birthday
+        easter_sunday(year) - timedelta(days=2),  # Good Friday
+        nth_weekday(year, 5, 0, -1),  # Memorial Day
+        observed(date(year, 7, 4)),  # Independence Day
+        nth_weekday(year, 9, 0, 1),  # Labor Day
+        nth_weekday(year, 11, 3, 4),  # Thanksgiving
+        observed(date(year, 12, 25)),  # Christmas
+    }
+    # New Year's Day falling on Saturday is not observed on the prior Friday.
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays.add(observed(new_year))
+    if year >= 2022:
+        holidays.add(observed(date(year, 6, 19)))  # Juneteenth
+    return holidays
+
+
+def nyse_early_closes(year: int) -> set[date]:
+    days = {
+        date(year, 7, 3),
+        nth_weekday(year, 11, 3, 4) + timedelta(days=1),  # Day after Thanksgiving
+        date(year, 12, 24),
+    }
+    return {d for d in days if d.weekday() < 5}
+
+
+class ExchangeCalendar:
+    """Sorted session arrays for one exchange over a range of years.
+
+    ``dates`` holds each session's local date, and ``opens``/``closes`` its
+    UTC open and close as epoch seconds, all in the same order.
+    """
+
+    def __init__(
+        self,
+        first_year: int,
+        last_year: int,
+        tz: str = EXCHANGE_TIMEZONE,
+    ):
+        self.timezone = tz
+        zone = ZoneInfo(tz)
+        dates, opens, closes = [], [], []
+        for year in range(first_year, last_year + 1):
+            holidays = nyse_holidays(year)
+            early = nyse_early_closes(year)
+            day = date(year, 1, 1)
+            while day.year == year:
+                if day.weekday() < 5 and day not in holidays:
+                    close = EARLY_CLOSE if day in early else REGULAR_CLOSE
+                    dates.append(day)
+                    opens.append(datetime.combine(day, REGULAR_OPEN, zone).timestamp())
+                    closes.append(datetime.combine(day, close, zone).timestamp())
+                day += timedelta(days=1)
+        self.dates = np.array(dates, dtype="datetime64[D]")
+        self.opens = np.array(opens, dtype=np.int64)
+        self.closes = np.array(closes, dtype=np.int64)
+
+    def session_index(self, now: datetime) -> int:
+        """Index of the latest session that opened at or before ``now``."""
+        return int(np.searchsorted(self.opens, now.timestamp(), side="right")) - 1
+
+    def is_open(self, now: datetime) -> bool:
+        i = self.session_index(now)
+        return i >= 0 and bool(now.timestamp() < self.closes[i])
+
+    def is_trading_day(self, day: date) -> bool:
+        i = int(np.searchsorted(self.dates, np.datetime64(day, "D")))
+        return i < len(self.dates) and bool(self.dates[i] == np.datetime64(day, "D"))
+
+    def next_open(self, now: datetime) -> datetime | None:
+        """First session open strictly after ``now``."""
+        i = int(np.searchsorted(self.opens, now.timestamp(), side="right"))
+        return self._to_datetime(self.opens, i)
+
+    def next_close(self, now: datetime) -> datetime | None:
+        """First session close strictly after ``now``."""
+        i = int(np.searchsorted(self.closes, now.timestamp(), side="right"))
+        return self._to_datetime(self.closes, i)
+
+    def sessions_before(self, day: date, count: int) -> np.ndarray:
+        """The last ``count`` session dates strictly before ``day``, oldest first."""
+        end = int(np.searchsorted(self.dates, np.datetime64(day, "D")))
+        return self.dates[max(end - count, 0) : end]
+
+    @staticmethod
+    def _to_datetime(values: np.ndarray, i: int) -> datetime | None:
+        if i >= len(values):
+            return None
+        return datetime.fromtimestamp(int(values[i]), timezone.utc)
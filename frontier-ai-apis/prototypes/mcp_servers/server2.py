@@ -4,12 +4,27 @@ This server provides book catalog management, member management,
 and lending/borrowing operations for a library system.
 """
 
-import random
-from datetime import datetime, timezone
+import argparse
+import asyncio
+import csv
+import functools
+import gc
+import heapq
+import itertools
+import json
+import re
+import threading
+import time
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
 import os
-from typing import Annotated
+import zlib
+from typing import Annotated, Callable, Iterable, Iterator, Literal
 
-from fastmcp import FastMCP
+import numpy as np
+from fastmcp import Context, FastMCP
 from pydantic import Field
 from rich import print
 
@@ -18,22 +33,735 @@ mcp = FastMCP(
 )
 
 
+# Catalog store
+@dataclass(slots=True)
+class Book:
+    book_id: str
+    title: str
+    author: str
+    isbn: str
+    year: int
+    copies_total: int
+    copies_available: int
+    location: str
+    added_at: datetime
+    updated_at: datetime
+    available: bool = True
+    summary: str = ""
+    # Bumped on every change so callers can detect concurrent updates.
+    version: int = 0
+
+    @property
+    def search_text(self) -> str:
+        return f"{self.title} {self.author} {self.summary}"
+
+    def to_dict(self) -> dict:
+        return {
+            "book_id": self.book_id,
+            "title": self.title,
+            "author": self.author,
+            "isbn": self.isbn,
+            "year": self.year,
+            "available": self.available and self.copies_available > 0,
+            "copies_total": self.copies_total,
+            "copies_available": self.copies_available,
+            "location": self.location,
+            "summary": self.summary,
+            "version": self.version,
+        }
+
+
+def isbn_key(isbn: str) -> str:
+    """ISBNs compare without hyphens or spaces, with a case-folded check digit."""
+    return isbn.replace("-", "").replace(" ", "").upper()
+
+
+def author_key(author: str) -> str:
+    return " ".join(author.casefold().split())
+
+
+def shelf_location(author: str) -> str:
+    """Fiction is shelved by the first letter of the author's surname."""
+    surname = author.split()[-1] if author.split() else "?"
+    return f"Fiction Section, Shelf {surname[0].upper()}"
+
+
+# Full-text search
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in is it of on or that the to with".split()
+)
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Document ordinals per block for block-max pruning (a multiple of 8, so each
+# block is whole bytes of a packed bitmap).
+BM25_BLOCK = 1024
+# Posting lists at least this long keep their block bounds between queries.
+BM25_CACHED_POSTINGS = 4096
+# Longer queries skip term-level pruning, whose cost grows with term subsets.
+BM25_PRUNE_TERMS = 8
+
+
+def tokenize(text: str) -> list[str]:
+    """Case-folded word tokens, minus a short English stopword list."""
+    return [t for t in TOKEN_PATTERN.findall(text.casefold()) if t not in STOPWORDS]
+
+
+def word_popcounts(bits: np.ndarray) -> np.ndarray:
+    """Set bits in each 64-bit word of a packed bitmap (SWAR, no lookups)."""
+    x = bits.view(np.uint64)
+    x = x - ((x >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    x = (x & np.uint64(0x3333333333333333)) + (
+        (x >> np.uint64(2)) & np.uint64(0x3333333333333333)
+    )
+    x = (x + (x >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return (x * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+
+def popcount(bits: np.ndarray) -> int:
+    return int(word_popcounts(bits).sum())
+
+
+def bit_ordinals(bits: np.ndarray) -> np.ndarray:
+    """Positions of the set bits in a packed bitmap, unpacking only set bytes."""
+    nonzero = np.flatnonzero(bits)
+    rows, cols = np.nonzero(np.unpackbits(bits[nonzero]).reshape(-1, 8))
+    return nonzero[rows] * 8 + cols
+
+
+def top_k(
+    docs: np.ndarray, scores: np.ndarray, k: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """The ``k`` best ``(doc, score)`` pairs, by score then ordinal."""
+    if len(scores) > k:
+        # Keep every document tied with the k-th score, then order exactly.
+        kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+        keep = scores >= kth
+        docs, scores = docs[keep], scores[keep]
+    ranked = np.lexsort((docs, -scores))[:k]
+    return docs[ranked], scores[ranked]
+
+
+def zero_extend(values: np.ndarray, size: int) -> np.ndarray:
+    grown = np.zeros(size, dtype=values.dtype)
+    grown[: len(values)] = values
+    return grown
+
+
+@dataclass(slots=True)
+class TermBlocks:
+    """Cached block bounds and packed membership bitmap for one posting list.
+
+    ``max_tf`` and ``min_length`` are indexed by block; blocks the term does
+    not occur in have ``max_tf == 0``. ``size`` is the posting count covered.
+    """
+
+    size: int
+    max_tf: np.ndarray
+    min_length: np.ndarray
+    bits: np.ndarray
+
+
+@dataclass(slots=True)
+class QueryTerm:
+    """One query term's postings, weight and bounds while a search runs."""
+
+    docs: np.ndarray
+    tf: np.ndarray
+    idf: float
+    bits: np.ndarray  # Packed live documents containing the term.
+    max_tf: int
+    bound: float  # Best score the term can add to any document.
+
+    def scores(self, tf: np.ndarray, norm: np.ndarray) -> np.ndarray:
+        return self.idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+
+class SearchIndex:
+    """BM25 inverted index with posting lists kept in compact typed arrays.
+
+    Each term maps to an ``array('I')`` of document ordinals and a parallel
+    ``array('H')`` of term frequencies. Documents get a new ordinal whenever
+    they are (re)indexed; old ordinals are tombstoned in ``_alive`` rather
+    than removed from the posting lists. Per-document lengths and liveness
+    live in NumPy arrays grown by doubling. Not thread-safe: the catalog
+    calls it under its own lock.
+
+    Queries are answered block-max style: ordinals are grouped into blocks
+    of ``BM25_BLOCK``, each term bounds its best possible score per block,
+    and blocks are scored in descending bound order until none left can
+    reach the current top ``k``. Match counts come from OR-ing packed
+    per-term bitmaps, so long posting lists are never scanned in full.
+    """
+
+    def __init__(self):
+        self._postings: dict[str, tuple[array, array]] = {}
+        self._blocks: dict[str, TermBlocks] = {}
+        self._doc_ids: list[str] = []
+        self._ordinal: dict[str, int] = {}
+        self._lengths = np.zeros(1024, dtype=np.uint32)
+        self._alive = np.zeros(1024, dtype=bool)
+        self._total_length = 0
+
+    def add(self, doc_id: str, text: str) -> None:
+        self.remove(doc_id)
+        doc = len(self._doc_ids)
+        tokens = tokenize(text)
+        for term, tf in Counter(tokens).items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array("I"), array("H"))
+            postings[0].append(doc)
+            postings[1].append(min(tf, 0xFFFF))
+        self._reserve(doc + 1)
+        self._doc_ids.append(doc_id)
+        self._ordinal[doc_id] = doc
+        self._lengths[doc] = len(tokens)
+        self._alive[doc] = True
+        self._total_length += len(tokens)
+
+    def add_many(self, docs: list[tuple[str, str]]) -> None:
+        """Index many ``(doc_id, text)`` pairs with one sort instead of per-term appends.
+
+        Tokens are mapped to batch-local term ids, then (term, document)
+        pairs are counted with ``np.unique`` and appended to each term's
+        posting list as a single slice.
+        """
+        if not docs:
+            return
+        for doc_id, _ in docs:
+            self.remove(doc_id)
+        first = len(self._doc_ids)
+        tokens = [tokenize(text) for _, text in docs]
+        lengths = np.fromiter(map(len, tokens), dtype=np.int64, count=len(docs))
+        flat = list(itertools.chain.from_iterable(tokens))
+        names = list(dict.fromkeys(flat))
+        term_index = dict(zip(names, range(len(names))))
+        term_ids = np.fromiter(map(term_index.__getitem__, flat), np.int64, len(flat))
+        for i, (doc_id, _) in enumerate(docs):
+            self._doc_ids.append(doc_id)
+            self._ordinal[doc_id] = first + i
+        self._reserve(first + len(docs))
+        self._lengths[first : first + len(docs)] = lengths
+        self._alive[first : first + len(docs)] = True
+        self._total_length += int(lengths.sum())
+
+        doc_of = np.repeat(np.arange(first, first + len(docs), dtype=np.int64), lengths)
+        stride = first + len(docs)
+        pairs, tf = np.unique(term_ids * stride + doc_of, return_counts=True)
+        if not len(pairs):
+            return
+        terms, doc_ordinals = np.divmod(pairs, stride)
+        doc_ordinals = doc_ordinals.astype(np.uint32)
+        tf = np.minimum(tf, 0xFFFF).astype(np.uint16)
+        starts = np.flatnonzero(np.r_[True, terms[1:] != terms[:-1]])
+        bounds = np.r_[starts, len(terms)].tolist()
+        for term_id, lo, hi in zip(terms[starts].tolist(), bounds, bounds[1:]):
+            postings = self._postings.get(names[term_id])
+            if postings is None:
+                postings = self._postings[names[term_id]] = (array("I"), array("H"))
+            postings[0].frombytes(doc_ordinals[lo:hi].tobytes())
+            postings[1].frombytes(tf[lo:hi].tobytes())
+
+    def _reserve(self, size: int) -> None:
+        if size > len(self._lengths):
+            capacity = max(size, 2 * len(self._lengths))
+            self._lengths = np.resize(self._lengths, capacity)
+            self._alive = np.resize(self._alive, capacity)
+
+    def remove(self, doc_id: str) -> None:
+        doc = self._ordinal.pop(doc_id, None)
+        if doc is not None:
+            self._alive[doc] = False
+            self._total_length -= int(self._lengths[doc])
+
+    def search(self, query: str, k: int) -> tuple[list[tuple[str, float]], int]:
+        """Top ``k`` documents by BM25 score and the total number of matches.
+
+        Ties are broken by indexing order, so pages are stable between calls.
+        """
+        terms = [t for t in dict.fromkeys(tokenize(query)) if t in self._postings]
+        live = len(self._ordinal)
+        if not terms or not live:
+            return [], 0
+        count = len(self._doc_ids)
+        nblocks = -(-count // BM25_BLOCK)
+        alive = np.zeros(nblocks * BM25_BLOCK // 8, dtype=np.uint8)
+        packed = np.packbits(self._alive[:count])
+        alive[: len(packed)] = packed
+        avg_length = self._total_length / live
+
+        matched = np.zeros_like(alive)
+        upper = np.zeros(nblocks)
+        query_terms = []
+        for term in terms:
+            docs = np.frombuffer(self._postings[term][0], dtype=np.uint32)
+            tf = np.frombuffer(self._postings[term][1], dtype=np.uint16)
+            if len(docs) >= BM25_CACHED_POSTINGS:
+                cached = self._term_blocks(term, docs, tf)
+                blocks = np.flatnonzero(cached.max_tf)
+                max_tf = cached.max_tf[blocks]
+                min_length = cached.min_length[blocks]
+                bits = cached.bits
+            else:
+                blocks, max_tf, min_length = self._block_bounds(docs, tf)
+                bits = self._bitmap(docs, 0, len(alive) * 8)
+            size = min(len(bits), len(alive))
+            live_bits = np.zeros_like(alive)
+            live_bits[:size] = bits[:size] & alive[:size]
+            df = popcount(live_bits)
+            if not df:
+                continue
+            matched |= live_bits
+            idf = float(np.log1p((live - df + 0.5) / (df + 0.5)))
+            term = QueryTerm(docs, tf, idf, live_bits, int(max_tf.max()), 0.0)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * min_length / avg_length)
+            block_bounds = term.scores(max_tf, norm)
+            term.bound = float(block_bounds.max())
+            upper[blocks] += block_bounds
+            query_terms.append(term)
+        total = popcount(matched)
+        if not total:
+            return [], 0
+
+        # Highest bound first; equal bounds in ordinal order for stable ties.
+        order = np.lexsort((np.arange(nblocks), -upper))[: np.count_nonzero(upper)]
+        docs = np.empty(0, dtype=np.int64)
+        scores = np.empty(0)
+        eligible, pruned_at = None, None
+        start, batch = 0, 1
+        while start < len(order):
+            chosen = order[start : start + batch]
+            if len(docs) == k:
+                threshold = scores[-1]
+                # A block can only place if it could beat or tie (with a lower
+                # ordinal) the current k-th hit; bounds only fall from here.
+                bound = upper[chosen]
+                viable = (bound > threshold) | (
+                    (bound == threshold) & (chosen * BM25_BLOCK < docs[-1])
+                )
+                cut = len(chosen) if viable.all() else int(np.argmin(viable))
+                if not cut:
+                    break
+                chosen = chosen[:cut]
+                if threshold != pruned_at:
+                    pruned_at = threshold
+                    eligible = self._eligible(query_terms, threshold)
+                    if eligible is not None:
+                        per_block = word_popcounts(eligible).reshape(nblocks, -1)
+                        per_block = per_block.sum(axis=1)
+                if eligible is not None:
+                    pending = upper >= threshold
+                    pending[order[:start]] = False
+                    # Once the documents left to check are fewer than the next
+                    # batch would cover, score them directly and stop.
+                    if per_block[pending].sum() <= len(chosen) * BM25_BLOCK:
+                        candidates = bit_ordinals(eligible)
+                        candidates = candidates[pending[candidates // BM25_BLOCK]]
+                        found = self._score_docs(
+                            candidates, query_terms, avg_length, threshold, docs[-1]
+                        )
+                        docs, scores = top_k(
+                            np.concatenate((docs, found[0])),
+                            np.concatenate((scores, found[1])),
+                            k,
+                        )
+                        break
+            found = self._score_blocks(chosen, query_terms, avg_length)
+            docs, scores = top_k(
+                np.concatenate((docs, found[0])), np.concatenate((scores, found[1])), k
+            )
+            start += batch
+            batch *= 2
+        hits = [
+            (self._doc_ids[doc], score)
+            for doc, score in zip(docs.tolist(), scores.tolist())
+        ]
+        return hits, total
+
+    @staticmethod
+    def _eligible(terms: list[QueryTerm], threshold: float) -> np.ndarray | None:
+        """Packed documents whose matching terms' bounds can reach ``threshold``.
+
+        This is MaxScore-style pruning on the term bitmaps: a document can
+        only score ``threshold`` if it contains some set of terms whose
+        bounds add up to it. Returns ``None`` for queries with too many
+        terms to enumerate the sets.
+        """
+        if len(terms) > BM25_PRUNE_TERMS:
+            return None
+        terms = sorted(terms, key=lambda term: -term.bound)
+        remaining = np.cumsum([term.bound for term in terms][::-1])[::-1].tolist()
+        # Sums of bounds round differently from sums of scores; leave slack.
+        floor = threshold * (1 - 1e-9)
+        eligible = np.zeros_like(terms[0].bits)
+        # Depth-first over term sets, ending each branch once it reaches the
+        # floor or can no longer reach it.
+        stack = [(0, None, 0.0)]
+        while stack:
+            i, bits, reach = stack.pop()
+            if reach >= floor:
+                eligible |= bits
+            elif i < len(terms) and reach + remaining[i] >= floor:
+                term_bits = terms[i].bits
+                stack.append((i + 1, bits, reach))
+                with_term = term_bits if bits is None else bits & term_bits
+                stack.append((i + 1, with_term, reach + terms[i].bound))
+        return eligible
+
+    def _score_docs(
+        self,
+        candidates: np.ndarray,
+        terms: list[QueryTerm],
+        avg_length: float,
+        threshold: float,
+        last: int,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Exact BM25 scores of the ``candidates`` that can still place.
+
+        Each candidate is first bounded from its own length and the terms its
+        bitmaps say it contains; only those that could beat ``threshold``, or
+        tie it ahead of ordinal ``last``, are looked up in the postings.
+        """
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[candidates] / avg_length)
+        byte, shift = candidates >> 3, 7 - (candidates & 7)
+        present = [(term.bits[byte] >> shift) & 1 == 1 for term in terms]
+        bound = np.zeros(len(candidates))
+        for term, has in zip(terms, present):
+            bound[has] += term.scores(np.full(1, term.max_tf), norm[has])
+        # Same terms in the same order as the exact score, so bound >= score.
+        keep = (bound > threshold) | ((bound == threshold) & (candidates < last))
+        candidates, norm = candidates[keep], norm[keep]
+        keys = candidates.astype(np.uint32)
+        acc = np.zeros(len(candidates))
+        for term, has in zip(terms, present):
+            has = has[keep]
+            rows = np.searchsorted(term.docs, keys[has])
+            acc[has] += term.scores(term.tf[rows], norm[has])
+        return candidates, acc
+
+    def _score_blocks(
+        self, blocks: np.ndarray, terms: list[QueryTerm], avg_length: float
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Exact BM25 scores of the live documents in ``blocks`` matching a term."""
+        acc = np.zeros(len(blocks) * BM25_BLOCK)
+        # Maps an ordinal in blocks[j] to its slot in the j-th span of ``acc``.
+        shift = (np.arange(len(blocks)) - blocks) * BM25_BLOCK
+        edges = (blocks * BM25_BLOCK).astype(np.uint32)
+        for term in terms:
+            lo = np.searchsorted(term.docs, edges)
+            hi = np.searchsorted(term.docs, edges + BM25_BLOCK)
+            counts = hi - lo
+            size = int(counts.sum())
+            if not size:
+                continue
+            rows = np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(size)
+            docs = term.docs[rows].astype(np.int64)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[docs] / avg_length)
+            acc[docs + np.repeat(shift, counts)] += term.scores(term.tf[rows], norm)
+        slots = np.flatnonzero(acc)
+        docs = slots - shift[slots // BM25_BLOCK]
+        live = self._alive[docs]
+        return docs[live], acc[slots[live]]
+
+    def _block_bounds(
+        self, docs: np.ndarray, tf: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Blocks ``docs`` fall in, with each block's max tf and min length."""
+        blocks = docs // BM25_BLOCK
+        starts = np.flatnonzero(np.r_[True, blocks[1:] != blocks[:-1]])
+        return (
+            blocks[starts],
+            np.maximum.reduceat(tf, starts),
+            np.minimum.reduceat(self._lengths[docs], starts),
+        )
+
+    @staticmethod
+    def _bitmap(docs: np.ndarray, first: int, end: int) -> np.ndarray:
+        """Packed membership of ``docs`` among ordinals ``first`` to ``end``."""
+        mask = np.zeros(end - first, dtype=bool)
+        mask[docs - first] = True
+        return np.packbits(mask)
+
+    def _term_blocks(self, term: str, docs: np.ndarray, tf: np.ndarray) -> TermBlocks:
+        """Block bounds for a long posting list, updated for new postings.
+
+        Postings are only ever appended with increasing ordinals, so only
+        blocks from the first new posting onward need recomputing.
+        """
+        cached = self._blocks.get(term)
+        if cached is None:
+            cached = self._blocks[term] = TermBlocks(
+                0,
+                np.zeros(0, dtype=np.uint16),
+                np.zeros(0, dtype=np.uint32),
+                np.zeros(0, dtype=np.uint8),
+            )
+        if cached.size == len(docs):
+            return cached
+        first = int(docs[cached.size]) // BM25_BLOCK * BM25_BLOCK
+        lo = int(np.searchsorted(docs, first))
+        blocks, max_tf, min_length = self._block_bounds(docs[lo:], tf[lo:])
+        nblocks = int(blocks[-1]) + 1
+        if nblocks > len(cached.max_tf):
+            capacity = max(nblocks, 2 * len(cached.max_tf))
+            cached.max_tf = zero_extend(cached.max_tf, capacity)
+            cached.min_length = zero_extend(cached.min_length, capacity)
+            cached.bits = zero_extend(cached.bits, capacity * BM25_BLOCK // 8)
+        # Earlier postings all precede block ``first``'s end, so later blocks
+        # are still zero and ``first`` itself is rebuilt from its start.
+        cached.max_tf[blocks] = max_tf
+        cached.min_length[blocks] = min_length
+        bits = self._bitmap(docs[lo:], first, nblocks * BM25_BLOCK)
+        cached.bits[first // 8 : first // 8 + len(bits)] = bits
+        cached.size = len(docs)
+        return cached
+
+
+LOCK_STRIPES = 64
+
+
+class Catalog:
+    """Books keyed by ``book_id`` with a unique ISBN index and an author index.
+
+    Every mutation updates all three maps and the full-text index under one
+    lock, so lookups by id, ISBN or author are dictionary hits regardless of
+    catalog size. Copy counts and versions are guarded by a striped per-book
+    lock instead, so checkouts of different books never wait on each other
+    or on indexing.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Reentrant so a caller can hold a book's stripe across take_copy.
+        self._stripes = [threading.RLock() for _ in range(LOCK_STRIPES)]
+        self._ids = itertools.count(1)
+        self._books: dict[str, Book] = {}
+        self._by_isbn: dict[str, str] = {}
+        # Author key -> insertion-ordered set of book ids.
+        self._by_author: dict[str, dict[str, None]] = {}
+        self._search = SearchIndex()
+        # Bulk-loaded book ids not yet in the author and full-text indexes.
+        self._pending: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self._books)
+
+    def add(
+        self,
+        title: str,
+        author: str,
+        isbn: str,
+        year: int,
+        copies: int = 1,
+        summary: str = "",
+    ) -> Book | None:
+        """Add a book, or return ``None`` if its ISBN is already catalogued."""
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            book = self._insert(title, author, isbn, year, copies, summary, now)
+            if book is not None:
+                self._by_author.setdefault(author_key(author), {})[book.book_id] = None
+                self._search.add(book.book_id, book.search_text)
+            return book
+
+    def add_many(self, records: list[tuple]) -> int:
+        """Insert ``(title, author, isbn, year, copies, summary)`` records.
+
+        Only the id and ISBN maps are updated; the author and full-text
+        indexes are deferred to one ``index_pending`` call at the end of a
+        bulk load. Returns the number of records skipped as duplicate ISBNs.
+        """
+        now = datetime.now(timezone.utc)
+        duplicates = 0
+        with self._lock:
+            for record in records:
+                book = self._insert(*record, now)
+                if book is None:
+                    duplicates += 1
+                else:
+                    self._pending.append(book.book_id)
+        return duplicates
+
+    def index_pending(self) -> None:
+        """Add every book from unfinished bulk loads to the secondary indexes."""
+        with self._lock:
+            books = [self._books[b] for b in self._pending if b in self._books]
+            self._pending = []
+            for book in books:
+                self._by_author.setdefault(author_key(book.author), {})[
+                    book.book_id
+                ] = None
+            self._search.add_many([(book.book_id, book.search_text) for book in books])
+
+    def _insert(
+        self,
+        title: str,
+        author: str,
+        isbn: str,
+        year: int,
+        copies: int,
+        summary: str,
+        now: datetime,
+    ) -> Book | None:
+        key = isbn_key(isbn)
+        if key in self._by_isbn:
+            return None
+        book = Book(
+            book_id=f"book_{next(self._ids):06d}",
+            title=title,
+            author=author,
+            isbn=isbn,
+            year=year,
+            copies_total=copies,
+            copies_available=copies,
+            location=shelf_location(author),
+            added_at=now,
+            updated_at=now,
+            summary=summary,
+        )
+        self._books[book.book_id] = book
+        self._by_isbn[key] = book.book_id
+        return book
+
+    def get(self, book_id: str) -> Book | None:
+        return self._books.get(book_id)
+
+    def get_by_isbn(self, isbn: str) -> Book | None:
+        book_id = self._by_isbn.get(isbn_key(isbn))
+        return self._books.get(book_id) if book_id else None
+
+    def by_author(self, author: str) -> list[Book]:
+        with self._lock:
+            book_ids = list(self._by_author.get(author_key(author), ()))
+        return [self._books[book_id] for book_id in book_ids]
+
+    def search(self, query: str, k: int) -> tuple[list[tuple[Book, float]], int]:
+        """Top ``k`` books for ``query`` by BM25 score, and the match count."""
+        with self._lock:
+            hits, total = self._search.search(query, k)
+            return [(self._books[book_id], score) for book_id, score in hits], total
+
+    def update(
+        self,
+        book_id: str,
+        title: str | None = None,
+        author: str | None = None,
+        available: bool | None = None,
+    ) -> Book | None:
+        """Apply the given changes, or return ``None`` for an unknown book."""
+        with self._lock:
+            book = self._books.get(book_id)
+            if book is None:
+                return None
+            if title is not None:
+                book.title = title
+            if author is not None and author != book.author:
+                self._unlink_author(book)
+                book.author = author
+                book.location = shelf_location(author)
+                self._by_author.setdefault(author_key(author), {})[book_id] = None
+            if title is not None or author is not None:
+                self._search.add(book_id, book.search_text)
+            with self.book_lock(book_id):
+                if available is not None:
+                    book.available = available
+                book.updated_at = datetime.now(timezone.utc)
+                book.version += 1
+            return book
+
+    def book_lock(self, book_id: str) -> threading.RLock:
+        """The stripe lock guarding ``book_id``'s copy count and version."""
+        return self._stripes[zlib.crc32(book_id.encode()) % LOCK_STRIPES]
+
+    def take_copy(
+        self, book_id: str, expected_version: int | None = None
+    ) -> str | None:
+        """Lend one copy of ``book_id``, returning a reason if none can be lent.
+
+        With ``expected_version`` this is a compare-and-swap: the copy is only
+        taken if nothing has changed the book since the caller read it.
+        """
+        with self.book_lock(book_id):
+            book = self._books.get(book_id)
+            if book is None:
+                return "Book not found"
+            if expected_version is not None and book.version != expected_version:
+                return f"Book was modified (now version {book.version}); re-read it"
+            if not book.available:
+                return "Book is not available for checkout"
+            if book.copies_available <= 0:
+                return "No copies available"
+            book.copies_available -= 1
+            book.version += 1
+            return None
+
+    def return_copy(self, book_id: str) -> None:
+        with self.book_lock(book_id):
+            book = self._books.get(book_id)
+            if book is not None and book.copies_available < book.copies_total:
+                book.copies_available += 1
+                book.version += 1
+
+    def delete(self, book_id: str) -> Book | None:
+        with self._lock, self.book_lock(book_id):
+            book = self._books.pop(book_id, None)
+            if book is None:
+                return None
+            del self._by_isbn[isbn_key(book.isbn)]
+            self._unlink_author(book)
+            self._search.remove(book_id)
+            return book
+
+    def _unlink_author(self, book: Book) -> None:
+        # Books added by an unfinished bulk load are not in the index yet.
+        key = author_key(book.author)
+        book_ids = self._by_author.get(key, {})
+        book_ids.pop(book.book_id, None)
+        if not book_ids:
+            self._by_author.pop(key, None)
+
+
+SEED_BOOKS = [
+    ("1984", "George Orwell", "978-0451524935", 1949, 4),
+    ("To Kill a Mockingbird", "Harper Lee", "978-0061120084", 1960, 3),
+    ("The Catcher in the Rye", "J.D. Salinger", "978-0316769174", 1951, 5),
+    ("The Great Gatsby", "F. Scott Fitzgerald", "978-0743273565", 1925, 3),
+    ("Pride and Prejudice", "Jane Austen", "978-0141439518", 1813, 4),
+    ("Moby Dick", "Herman Melville", "978-1503280786", 1851, 2),
+    ("The Hobbit", "J.R.R. Tolkien", "978-0547928227", 1937, 3),
+]
+
+CATALOG = Catalog()
+for seed_book in SEED_BOOKS:
+    CATALOG.add(*seed_book)
+
+
 @mcp.tool(name="add_book", description="Add a new book to the library catalog.")
 def add_book(
     title: Annotated[str, Field(description="Title of the book")],
     author: Annotated[str, Field(description="Author of the book")],
     isbn: Annotated[str, Field(description="ISBN number")],
     year: Annotated[int, Field(description="Publication year")],
+    copies: Annotated[int, Field(description="Number of copies", ge=1)] = 1,
+    summary: Annotated[str, Field(description="Short description of the book")] = "",
 ) -> dict:
     print(f"[green]invoking tool:add_book title={title}, author={author}[/green]")
+
+    book = CATALOG.add(title, author, isbn, year, copies, summary)
+    if book is None:
+        existing = CATALOG.get_by_isbn(isbn)
+        return {
+            "status": "rejected",
+            "isbn": isbn,
+            "book_id": existing.book_id if existing else None,
+            "reason": "A book with this ISBN is already in the catalog",
+        }
+
     return {
         "status": "added",
-        "book_id": "book_12345",
-        "title": title,
-        "author": author,
-        "isbn": isbn,
-        "year": year,
-        "added_at": datetime.now(timezone.utc).isoformat(),
+        **book.to_dict(),
+        "added_at": book.added_at.isoformat(),
     }
 
 
@@ -42,10 +770,13 @@ def delete_book(
     book_id: Annotated[str, Field(description="The book ID to delete")],
 ) -> dict:
     print(f"[red]invoking tool:delete_book book_id={book_id}[/red]")
+
+    book = CATALOG.delete(book_id)
+
     return {
-        "status": "deleted",
+        "status": "deleted" if book else "not_found",
         "book_id": book_id,
-        "deleted_at": datetime.now(timezone.utc).isoformat(),
+        "deleted_at": datetime.now(timezone.utc).isoformat() if book else None,
     }
 
 
@@ -57,39 +788,74 @@ def update_book(
     available: Annotated[bool | None, Field(description="Availability status")] = None,
 ) -> dict:
     print(f"[yellow]invoking tool:update_book book_id={book_id}[/yellow]")
+
+    book = CATALOG.update(book_id, title, author, available)
+    if book is None:
+        return {"status": "not_found", "book_id": book_id}
+
     return {
         "status": "updated",
-        "book_id": book_id,
-        "title": title or "The Great Gatsby",
-        "author": author or "F. Scott Fitzgerald",
-        "available": available if available is not None else True,
-        "updated_at": datetime.now(timezone.utc).isoformat(),
+        **book.to_dict(),
+        "updated_at": book.updated_at.isoformat(),
     }
 
 
-@mcp.tool(name="search_books", description="Search for books by title or author.")
+MAX_SEARCH_RESULTS = 100
+
+
+@mcp.tool(
+    name="search_books",
+    description="Search for books by title, author or summary, best matches first.",
+)
 def search_books(
-    query: Annotated[str, Field(description="Search query for title or author")],
+    query: Annotated[
+        str, Field(description="Search terms matched against title, author and summary")
+    ],
+    limit: Annotated[
+        int,
+        Field(description="Maximum results per page", ge=1, le=MAX_SEARCH_RESULTS),
+    ] = 10,
+    cursor: Annotated[
+        str | None,
+        Field(description="next_cursor from a previous page to continue from"),
+    ] = None,
 ) -> dict:
     print(f"[blue]invoking tool:search_books query={query}[/blue]")
+
+    try:
+        offset = int(cursor) if cursor else 0
+        if offset < 0:
+            raise ValueError
+    except ValueError:
+        return {"status": "rejected", "query": query, "reason": "Invalid cursor"}
+
+    # An ISBN or an exact author name is answered from its index, unranked.
+    book = CATALOG.get_by_isbn(query)
+    by_author = CATALOG.by_author(query) if book is None else []
+    if book is not None:
+        hits, total = [(book, None)], 1
+    elif by_author:
+        by_author.sort(key=lambda book: (book.title, book.book_id))
+        hits, total = [(book, None) for book in by_author], len(by_author)
+    else:
+        hits, total = CATALOG.search(query, offset + limit)
+    results = [
+        {
+            "book_id": book.book_id,
+            "title": book.title,
+            "author": book.author,
+            "isbn": book.isbn,
+            "available": book.available and book.copies_available > 0,
+            "score": round(score, 4) if score is not None else None,
+        }
+        for book, score in hits[offset : offset + limit]
+    ]
+    next_offset = offset + len(results)
+
     return {
-        "results": [
-            {
-                "book_id": "book_001",
-                "title": "1984",
-                "author": "George Orwell",
-                "isbn": "978-0451524935",
-                "available": True,
-            },
-            {
-                "book_id": "book_002",
-                "title": "To Kill a Mockingbird",
-                "author": "Harper Lee",
-                "isbn": "978-0061120084",
-                "available": False,
-            },
-        ],
-        "total": 2,
+        "results": results,
+        "total": total,
+        "next_cursor": str(next_offset) if next_offset < total else None,
     }
 
 
@@ -98,35 +864,355 @@ def get_book_details(
     book_id: Annotated[str, Field(description="The book ID")],
 ) -> dict:
     print(f"[cyan]invoking tool:get_book_details book_id={book_id}[/cyan]")
-    return {
-        "book_id": book_id,
-        "title": "The Catcher in the Rye",
-        "author": "J.D. Salinger",
-        "isbn": "978-0316769174",
-        "year": 1951,
-        "available": True,
-        "copies_total": 5,
-        "copies_available": 3,
-        "location": "Fiction Section, Shelf A3",
-    }
+
+    book = CATALOG.get(book_id)
+    if book is None:
+        return {"status": "not_found", "book_id": book_id}
+
+    return book.to_dict()
+
+
+# Members
+MEMBERSHIP_TYPES = ("student", "adult", "senior")
+MEMBERSHIP_DAYS = 365
+# Counter columns in MemberTable._counters.
+CHECKED_OUT, OVERDUE, TOTAL_BORROWED = range(3)
+
+
+class MemberTable:
+    """Members stored in parallel arrays indexed by a dense row number.
+
+    Lending counters and accrued fees live in NumPy columns that the loan
+    ledger bumps in O(1) as loans open, fall overdue, accrue fees and
+    close, so member lookups never aggregate over loan history.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._row: dict[str, int] = {}
+        self._by_email: dict[str, str] = {}
+        self._member_ids: list[str] = []
+        self._names: list[str] = []
+        self._emails: list[str] = []
+        self._types = np.zeros(capacity, dtype=np.uint8)
+        self._registered = np.zeros(capacity, dtype="datetime64[s]")
+        self._counters = np.zeros((capacity, 3), dtype=np.int64)
+        self._fees = np.zeros(capacity)
+
+    def register(
+        self,
+        name: str,
+        email: str,
+        membership_type: str = "adult",
+        member_id: str | None = None,
+        registered_at: datetime | None = None,
+    ) -> str | None:
+        """Add a member and return their id, or ``None`` if the email is taken."""
+        email_key = email.strip().casefold()
+        registered_at = registered_at or datetime.now(timezone.utc)
+        with self._lock:
+            if email_key in self._by_email:
+                return None
+            member_id = member_id or f"mem_{next(self._ids):05d}"
+            row = len(self._member_ids)
+            if row == len(self._types):
+                self._grow()
+            self._row[member_id] = row
+            self._by_email[email_key] = member_id
+            self._member_ids.append(member_id)
+            self._names.append(name)
+            self._emails.append(email)
+            self._types[row] = MEMBERSHIP_TYPES.index(membership_type)
+            self._registered[row] = np.datetime64(
+                registered_at.replace(tzinfo=None), "s"
+            )
+            return member_id
+
+    def __contains__(self, member_id: str) -> bool:
+        return member_id in self._row
+
+    def get_by_email(self, email: str) -> str | None:
+        return self._by_email.get(email.strip().casefold())
+
+    def name(self, member_id: str) -> str | None:
+        row = self._row.get(member_id)
+        return self._names[row] if row is not None else None
+
+    def info(self, member_id: str) -> dict | None:
+        with self._lock:
+            row = self._row.get(member_id)
+            if row is None:
+                return None
+            checked_out, overdue, total = self._counters[row].tolist()
+            fees = float(self._fees[row])
+            membership_type = MEMBERSHIP_TYPES[self._types[row]]
+            registered = self._registered[row].item().replace(tzinfo=timezone.utc)
+        # Memberships renew on each anniversary of registration.
+        terms = (datetime.now(timezone.utc) - registered).days // MEMBERSHIP_DAYS + 1
+        return {
+            "member_id": member_id,
+            "name": self._names[row],
+            "email": self._emails[row],
+            "membership_type": membership_type,
+            "books_checked_out": checked_out,
+            "books_overdue": overdue,
+            "total_borrowed": total,
+            "late_fees": round(fees, 2),
+            "member_since": registered.isoformat(),
+            "expiry_date": (
+                registered + timedelta(days=MEMBERSHIP_DAYS * terms)
+            ).isoformat(),
+        }
+
+    def record_checkout(self, member_id: str) -> None:
+        self._bump(member_id, (CHECKED_OUT, TOTAL_BORROWED), 1)
+
+    def record_overdue(self, member_id: str) -> None:
+        self._bump(member_id, (OVERDUE,), 1)
+
+    def record_return(self, member_id: str, was_overdue: bool) -> None:
+        self._bump(
+            member_id, (CHECKED_OUT, OVERDUE) if was_overdue else (CHECKED_OUT,), -1
+        )
+
+    def record_fee(self, member_id: str, amount: float) -> None:
+        with self._lock:
+            row = self._row.get(member_id)
+            if row is not None:
+                self._fees[row] += amount
+
+    def _bump(self, member_id: str, columns: tuple[int, ...], delta: int) -> None:
+        with self._lock:
+            row = self._row.get(member_id)
+            if row is not None:
+                for column in columns:
+                    self._counters[row, column] += delta
+
+    def _grow(self) -> None:
+        capacity = 2 * len(self._types)
+        self._types = np.resize(self._types, capacity)
+        self._registered = np.resize(self._registered, capacity)
+        counters = np.zeros((capacity, 3), dtype=np.int64)
+        counters[: len(self._counters)] = self._counters
+        self._counters = counters
+        fees = np.zeros(capacity)
+        fees[: len(self._fees)] = self._fees
+        self._fees = fees
+
+
+MEMBERS = MemberTable()
+
+SEED_MEMBERS = [
+    ("mem_111", "Sarah Smith", "sarah.smith@example.com", "adult"),
+    ("mem_222", "John Doe", "john.doe@example.com", "adult"),
+    ("mem_333", "Emily Brown", "emily.brown@example.com", "student"),
+    ("mem_444", "Alex Johnson", "alex.johnson@example.com", "adult"),
+]
+for seed_id, seed_name, seed_email, seed_type in SEED_MEMBERS:
+    MEMBERS.register(
+        seed_name,
+        seed_email,
+        seed_type,
+        member_id=seed_id,
+        registered_at=datetime(2020, 3, 15, tzinfo=timezone.utc),
+    )
+
+
+# Loan ledger
+LATE_FEE_PER_DAY = 0.50
+MAX_LATE_FEE = 25.00
+
+
+@dataclass(slots=True)
+class Loan:
+    transaction_id: str
+    book_id: str
+    member_id: str
+    checked_out_at: datetime
+    due_at: datetime
+    days_overdue: int = 0
+    late_fee: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "transaction_id": self.transaction_id,
+            "book_id": self.book_id,
+            "member_id": self.member_id,
+            "checkout_date": self.checked_out_at.isoformat(),
+            "due_date": self.due_at.isoformat(),
+            "days_overdue": self.days_overdue,
+            "late_fee": round(self.late_fee, 2),
+        }
+
+
+class LoanLedger:
+    """Active loans with a due-date min-heap and incrementally accrued fees.
+
+    Loans wait in ``_due`` until their due date passes, then move to the
+    due-ordered ``_overdue`` map, so finding newly overdue loans costs one
+    heap pop each instead of a scan of every active loan. Returned loans are
+    dropped from the heap lazily. Late fees accrue in a sweep that runs at
+    most once per day and only touches overdue loans; ``total_late_fees``
+    keeps their running sum, so listing overdue loans never re-adds them.
+    """
+
+    def __init__(self, members: MemberTable):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._members = members
+        self._active: dict[str, Loan] = {}
+        self._by_copy: dict[tuple[str, str], str] = {}
+        self._due: list[tuple[datetime, str]] = []
+        self._overdue: dict[str, Loan] = {}
+        self._swept_on: date | None = None
+        self.total_late_fees = 0.0
+
+    def checkout(
+        self, book_id: str, member_id: str, due_days: int, now: datetime | None = None
+    ) -> Loan | None:
+        """Open a loan, or return ``None`` if the member already has this book."""
+        now = now or datetime.now(timezone.utc)
+        with self._lock:
+            if (book_id, member_id) in self._by_copy:
+                return None
+            loan = Loan(
+                transaction_id=f"txn_{next(self._ids):08d}",
+                book_id=book_id,
+                member_id=member_id,
+                checked_out_at=now,
+                due_at=now + timedelta(days=due_days),
+            )
+            self._active[loan.transaction_id] = loan
+            self._by_copy[book_id, member_id] = loan.transaction_id
+            heapq.heappush(self._due, (loan.due_at, loan.transaction_id))
+            self._members.record_checkout(member_id)
+            return loan
+
+    def checkin(
+        self, book_id: str, member_id: str, now: datetime | None = None
+    ) -> Loan | None:
+        """Close the member's loan of ``book_id`` with its fee as of ``now``."""
+        now = now or datetime.now(timezone.utc)
+        with self._lock:
+            self._sweep(now)
+            transaction_id = self._by_copy.pop((book_id, member_id), None)
+            if transaction_id is None:
+                return None
+            overdue = self._overdue.pop(transaction_id, None)
+            if overdue is not None:
+                self.total_late_fees = round(self.total_late_fees - overdue.late_fee, 2)
+            self._members.record_return(member_id, overdue is not None)
+            return self._active.pop(transaction_id)
+
+    def holds(self, book_id: str, member_id: str) -> bool:
+        with self._lock:
+            return (book_id, member_id) in self._by_copy
+
+    def loans(self) -> list[Loan]:
+        with self._lock:
+            return list(self._active.values())
+
+    def sweep(self, now: datetime | None = None) -> None:
+        """Bring overdue status and late fees up to ``now``."""
+        with self._lock:
+            self._sweep(now or datetime.now(timezone.utc))
+
+    def overdue(
+        self, limit: int, now: datetime | None = None
+    ) -> tuple[list[Loan], int, float]:
+        """The ``limit`` longest-overdue loans, the overdue count and total fees."""
+        now = now or datetime.now(timezone.utc)
+        with self._lock:
+            self._sweep(now)
+            loans = list(itertools.islice(self._overdue.values(), limit))
+            return loans, len(self._overdue), self.total_late_fees
+
+    def _sweep(self, now: datetime) -> None:
+        while self._due and self._due[0][0] < now:
+            _, transaction_id = heapq.heappop(self._due)
+            loan = self._active.get(transaction_id)
+            if loan is not None:
+                self._overdue[transaction_id] = loan
+                self._members.record_overdue(loan.member_id)
+        today = now.date()
+        if today == self._swept_on:
+            return
+        self._swept_on = today
+        for loan in self._overdue.values():
+            days = (today - loan.due_at.date()).days
+            if days > loan.days_overdue:
+                accrued = (days - loan.days_overdue) * LATE_FEE_PER_DAY
+                accrued = min(accrued, MAX_LATE_FEE - loan.late_fee)
+                loan.late_fee += accrued
+                loan.days_overdue = days
+                self.total_late_fees = round(self.total_late_fees + accrued, 2)
+                self._members.record_fee(loan.member_id, accrued)
+
+
+LOANS = LoanLedger(MEMBERS)
+
+# Loans that were already overdue when the demo library opened.
+SEED_LOANS = [
+    ("978-0141439518", "mem_111", 10),
+    ("978-1503280786", "mem_222", 5),
+    ("978-0547928227", "mem_333", 2),
+]
+for isbn, member_id, days_overdue in SEED_LOANS:
+    seed_book = CATALOG.get_by_isbn(isbn)
+    CATALOG.take_copy(seed_book.book_id)
+    LOANS.checkout(
+        seed_book.book_id,
+        member_id,
+        14,
+        datetime.now(timezone.utc) - timedelta(days=14 + days_overdue),
+    )
 
 
 @mcp.tool(name="checkout_book", description="Check out a book for a member.")
 def checkout_book(
     book_id: Annotated[str, Field(description="The book ID to checkout")],
     member_id: Annotated[str, Field(description="The member ID")],
-    due_days: Annotated[int, Field(description="Number of days until due")] = 14,
+    due_days: Annotated[
+        int, Field(description="Number of days until due", ge=1, le=365)
+    ] = 14,
+    expected_version: Annotated[
+        int | None,
+        Field(
+            description="Only check out if the book is still at this version "
+            "(from get_book_details); rejected if it changed since"
+        ),
+    ] = None,
 ) -> dict:
     print(
         f"[green]invoking tool:checkout_book book_id={book_id}, member_id={member_id}[/green]"
     )
+
+    if member_id not in MEMBERS:
+        return {"status": "rejected", "book_id": book_id, "reason": "Member not found"}
+    # Holding the book's stripe makes the duplicate check, the copy and the
+    # loan one step, so concurrent checkouts can neither oversell nor double-lend.
+    with CATALOG.book_lock(book_id):
+        if LOANS.holds(book_id, member_id):
+            return {
+                "status": "rejected",
+                "book_id": book_id,
+                "reason": "Member already has this book checked out",
+            }
+        reason = CATALOG.take_copy(book_id, expected_version)
+        if reason is not None:
+            return {"status": "rejected", "book_id": book_id, "reason": reason}
+        loan = LOANS.checkout(book_id, member_id, due_days)
+        version = CATALOG.get(book_id).version
+
     return {
         "status": "checked_out",
         "book_id": book_id,
         "member_id": member_id,
-        "checkout_date": datetime.now(timezone.utc).isoformat(),
-        "due_date": "2026-02-03T10:00:00Z",
-        "transaction_id": "txn_98765",
+        "checkout_date": loan.checked_out_at.isoformat(),
+        "due_date": loan.due_at.isoformat(),
+        "transaction_id": loan.transaction_id,
+        "version": version,
     }
 
 
@@ -138,12 +1224,26 @@ def return_book(
     print(
         f"[blue]invoking tool:return_book book_id={book_id}, member_id={member_id}[/blue]"
     )
+
+    with CATALOG.book_lock(book_id):
+        loan = LOANS.checkin(book_id, member_id)
+        if loan is None:
+            return {
+                "status": "not_found",
+                "book_id": book_id,
+                "member_id": member_id,
+                "message": "No active loan of this book for this member",
+            }
+        CATALOG.return_copy(book_id)
+
     return {
         "status": "returned",
         "book_id": book_id,
         "member_id": member_id,
+        "transaction_id": loan.transaction_id,
         "return_date": datetime.now(timezone.utc).isoformat(),
-        "late_fee": 0.00,
+        "days_overdue": loan.days_overdue,
+        "late_fee": round(loan.late_fee, 2),
     }
 
 
@@ -152,18 +1252,30 @@ def add_member(
     name: Annotated[str, Field(description="Member's full name")],
     email: Annotated[str, Field(description="Member's email address")],
     membership_type: Annotated[
-        str, Field(description="Type of membership (student, adult, senior)")
+        Literal["student", "adult", "senior"],
+        Field(description="Type of membership (student, adult, senior)"),
     ] = "adult",
 ) -> dict:
     print(f"[green]invoking tool:add_member name={name}, email={email}[/green]")
+
+    member_id = MEMBERS.register(name, email, membership_type)
+    if member_id is None:
+        return {
+            "status": "rejected",
+            "email": email,
+            "member_id": MEMBERS.get_by_email(email),
+            "reason": "A member with this email is already registered",
+        }
+    info = MEMBERS.info(member_id)
+
     return {
         "status": "registered",
-        "member_id": "mem_54321",
+        "member_id": member_id,
         "name": name,
         "email": email,
         "membership_type": membership_type,
-        "registered_at": datetime.now(timezone.utc).isoformat(),
-        "expiry_date": "2027-01-20T00:00:00Z",
+        "registered_at": info["member_since"],
+        "expiry_date": info["expiry_date"],
     }
 
 
@@ -172,55 +1284,200 @@ def get_member_info(
     member_id: Annotated[str, Field(description="The member ID")],
 ) -> dict:
     print(f"[cyan]invoking tool:get_member_info member_id={member_id}[/cyan]")
-    return {
-        "member_id": member_id,
-        "name": "Alex Johnson",
-        "email": "alex.johnson@example.com",
-        "membership_type": "adult",
-        "books_checked_out": 2,
-        "books_overdue": 0,
-        "total_borrowed": 47,
-        "member_since": "2020-03-15T00:00:00Z",
-    }
+
+    LOANS.sweep()
+    info = MEMBERS.info(member_id)
+    if info is None:
+        return {"status": "not_found", "member_id": member_id}
+    return info
 
 
 @mcp.tool(
     name="get_overdue_books",
     description="Get a list of all overdue books in the system.",
 )
-def get_overdue_books() -> dict:
+def get_overdue_books(
+    limit: Annotated[
+        int, Field(description="Maximum number of loans to list", ge=1, le=1000)
+    ] = 100,
+) -> dict:
     print("[red]invoking tool:get_overdue_books[/red]")
-    return {
-        "overdue_count": 3,
-        "books": [
-            {
-                "book_id": "book_003",
-                "title": "Pride and Prejudice",
-                "member_id": "mem_111",
-                "member_name": "Sarah Smith",
-                "due_date": "2026-01-10T00:00:00Z",
-                "days_overdue": 10,
-                "late_fee": 5.00,
-            },
-            {
-                "book_id": "book_007",
-                "title": "Moby Dick",
-                "member_id": "mem_222",
-                "member_name": "John Doe",
-                "due_date": "2026-01-15T00:00:00Z",
-                "days_overdue": 5,
-                "late_fee": 2.50,
-            },
+
+    loans, overdue_count, total_late_fees = LOANS.overdue(limit)
+    books = []
+    for loan in loans:
+        book = CATALOG.get(loan.book_id)
+        books.append(
             {
-                "book_id": "book_015",
-                "title": "The Hobbit",
-                "member_id": "mem_333",
-                "member_name": "Emily Brown",
-                "due_date": "2026-01-18T00:00:00Z",
-                "days_overdue": 2,
-                "late_fee": 1.00,
-            },
-        ],
+                "book_id": loan.book_id,
+                "title": book.title if book else None,
+                "member_id": loan.member_id,
+                "member_name": MEMBERS.name(loan.member_id),
+                "due_date": loan.due_at.isoformat(),
+                "days_overdue": loan.days_overdue,
+                "late_fee": round(loan.late_fee, 2),
+                "transaction_id": loan.transaction_id,
+            }
+        )
+
+    return {
+        "overdue_count": overdue_count,
+        "total_late_fees": round(total_late_fees, 2),
+        "books": books,
+    }
+
+
+# Synthetic book details
+BOOK_AUTHORS = (
+    "Jane Austen",
+    "Mark Twain",
+    "Virginia Woolf",
+    "Ernest Hemingway",
+    "Toni Morrison",
+    "Gabriel García Márquez",
+    "Haruki Murakami",
+    "Margaret Atwood",
+    "Chinua Achebe",
+    "Isabel Allende",
+)
+
+BOOK_GENRES = (
+    "Fiction",
+    "Mystery",
+    "Science Fiction",
+    "Fantasy",
+    "Historical Fiction",
+    "Romance",
+    "Thriller",
+    "Literary Fiction",
+    "Dystopian",
+    "Adventure",
+)
+
+BOOK_PUBLISHERS = (
+    "Penguin Random House",
+    "HarperCollins",
+    "Simon & Schuster",
+    "Hachette Book Group",
+    "Macmillan Publishers",
+    "Vintage Books",
+    "Knopf",
+    "Scribner",
+    "Farrar, Straus and Giroux",
+    "Grove Press",
+)
+
+PLOT_TEMPLATES = (
+    "A gripping tale of {theme} that explores the depths of human nature.",
+    "An epic journey through {theme} that will captivate readers from start to finish.",
+    "A thought-provoking exploration of {theme} in modern society.",
+    "A riveting story that weaves together themes of {theme} and redemption.",
+    "An unforgettable narrative about {theme} and the human condition.",
+)
+
+PLOT_THEMES = (
+    "love and loss",
+    "identity and belonging",
+    "power and corruption",
+    "survival and resilience",
+    "family and legacy",
+    "truth and deception",
+    "freedom and oppression",
+    "hope and despair",
+    "justice and revenge",
+)
+
+BOOK_FORMATS = ("Hardcover", "Paperback", "eBook", "Audiobook")
+BOOK_INFO_CACHE_SIZE = int(os.getenv("BOOK_INFO_CACHE_SIZE", "65536"))
+
+
+def title_seeds(titles: list[str]) -> np.ndarray:
+    """64-bit seeds from case- and whitespace-normalized titles."""
+    seeds = np.empty(len(titles), dtype=np.uint64)
+    for i, title in enumerate(titles):
+        key = " ".join(title.casefold().split()).encode("utf-8")
+        seeds[i] = zlib.crc32(key) << 32 | zlib.adler32(key)
+    return seeds
+
+
+def splitmix64(state: np.ndarray) -> np.ndarray:
+    """One SplitMix64 step over a uint64 array (wrapping arithmetic)."""
+    z = state + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def synthetic_books(titles: list[str]) -> dict[str, np.ndarray]:
+    """Columnar synthetic details for many titles in one vectorized pass.
+
+    Every field is drawn from a SplitMix64 stream seeded by the title, so a
+    title always gets the same book no matter how or when it is generated.
+    Categorical fields are indices into the module-level tuples.
+    """
+    state = title_seeds(titles)
+
+    def draw(low: float, high: float) -> np.ndarray:
+        nonlocal state
+        state = splitmix64(state)
+        return low + (state >> np.uint64(11)) * (high - low) / 2.0**53
+
+    def pick(options: tuple) -> np.ndarray:
+        return draw(0, len(options)).astype(np.intp)
+
+    books = {
+        "author": pick(BOOK_AUTHORS),
+        "genre": pick(BOOK_GENRES),
+        "publisher": pick(BOOK_PUBLISHERS),
+        "publication_year": draw(1950, 2026).astype(np.int64),
+        "pages": draw(150, 801).astype(np.int64),
+        "rating": np.round(draw(3.5, 5.0), 1),
+        "reviews_count": draw(100, 50_001).astype(np.int64),
+        "theme": pick(PLOT_THEMES),
+        "plot": pick(PLOT_TEMPLATES),
+        "format": pick(BOOK_FORMATS),
+        "price": np.round(draw(9.99, 34.99), 2),
+    }
+    books["isbn"] = isbn13(draw(0, 1e9).astype(np.int64))
+    return books
+
+
+def isbn13(body: np.ndarray) -> np.ndarray:
+    """ISBN-13s as integers: 978 prefix, nine ``body`` digits, valid check digit."""
+    weighted = np.zeros(len(body), dtype=np.int64)
+    for position in range(9):
+        digit = body // 10 ** (8 - position) % 10
+        weighted += digit * (3 if position % 2 == 0 else 1)
+    # The 978 prefix contributes 9*1 + 7*3 + 8*1 = 38 to the weighted sum.
+    check = (10 - (38 + weighted) % 10) % 10
+    return (978_000_000_000 + body) * 10 + check
+
+
+def format_isbn(isbn: int) -> str:
+    digits = f"{isbn:013d}"
+    return f"{digits[:3]}-{digits[3]}-{digits[4:7]}-{digits[7:12]}-{digits[12]}"
+
+
+@functools.lru_cache(maxsize=BOOK_INFO_CACHE_SIZE)
+def book_info(title: str) -> dict:
+    """Synthetic details for one title, memoized in a bounded LRU cache."""
+    row = {key: values[0].item() for key, values in synthetic_books([title]).items()}
+    theme = PLOT_THEMES[row["theme"]]
+
+    return {
+        "title": title,
+        "author": BOOK_AUTHORS[row["author"]],
+        "genre": BOOK_GENRES[row["genre"]],
+        "publisher": BOOK_PUBLISHERS[row["publisher"]],
+        "publication_year": row["publication_year"],
+        "pages": row["pages"],
+        "isbn": format_isbn(row["isbn"]),
+        "rating": row["rating"],
+        "reviews_count": row["reviews_count"],
+        "summary": PLOT_TEMPLATES[row["plot"]].format(theme=theme),
+        "language": "English",
+        "format": BOOK_FORMATS[row["format"]],
+        "price": row["price"],
     }
 
 
@@ -233,96 +1490,259 @@ def get_book_info(
 ) -> dict:
     print(f"[magenta]invoking tool:get_book_info title={title}[/magenta]")
 
-    # Lists for random generation
-    authors = [
-        "Jane Austen",
-        "Mark Twain",
-        "Virginia Woolf",
-        "Ernest Hemingway",
-        "Toni Morrison",
-        "Gabriel García Márquez",
-        "Haruki Murakami",
-        "Margaret Atwood",
-        "Chinua Achebe",
-        "Isabel Allende",
-    ]
+    return dict(book_info(title))
 
-    genres = [
-        "Fiction",
-        "Mystery",
-        "Science Fiction",
-        "Fantasy",
-        "Historical Fiction",
-        "Romance",
-        "Thriller",
-        "Literary Fiction",
-        "Dystopian",
-        "Adventure",
-    ]
 
-    publishers = [
-        "Penguin Random House",
-        "HarperCollins",
-        "Simon & Schuster",
-        "Hachette Book Group",
-        "Macmillan Publishers",
-        "Vintage Books",
-        "Knopf",
-        "Scribner",
-        "Farrar, Straus and Giroux",
-        "Grove Press",
-    ]
+# Bulk import
+IMPORT_BATCH_SIZE = 10_000
+# The import_books tool only reads files under this directory; the CLI's
+# --import flag is trusted and may read any path.
+BOOK_IMPORT_DIR = os.path.realpath(
+    os.getenv(
+        "BOOK_IMPORT_DIR",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "imports"),
+    )
+)
+MAX_IMPORT_ERRORS = 20
+IMPORT_REQUIRED = ("title", "author", "isbn")
 
-    plot_templates = [
-        "A gripping tale of {theme} that explores the depths of human nature.",
-        "An epic journey through {theme} that will captivate readers from start to finish.",
-        "A thought-provoking exploration of {theme} in modern society.",
-        "A riveting story that weaves together themes of {theme} and redemption.",
-        "An unforgettable narrative about {theme} and the human condition.",
-    ]
 
-    themes = [
-        "love and loss",
-        "identity and belonging",
-        "power and corruption",
-        "survival and resilience",
-        "family and legacy",
-        "truth and deception",
-        "freedom and oppression",
-        "hope and despair",
-        "justice and revenge",
-    ]
+@dataclass
+class ImportReport:
+    read: int = 0
+    imported: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    errors: list[str] = field(default_factory=list)
+    started_at: float = field(default_factory=time.perf_counter)
+
+    def to_dict(self) -> dict:
+        return {
+            "read": self.read,
+            "imported": self.imported,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "errors": self.errors,
+            "seconds": round(time.perf_counter() - self.started_at, 2),
+        }
+
+
+def import_path(path: str) -> str | None:
+    """Resolve ``path`` against ``BOOK_IMPORT_DIR``; ``None`` if it leads outside."""
+    resolved = os.path.realpath(os.path.join(BOOK_IMPORT_DIR, path))
+    if os.path.commonpath([resolved, BOOK_IMPORT_DIR]) != BOOK_IMPORT_DIR:
+        return None
+    return resolved
 
-    # Generate random data
-    author = random.choice(authors)
-    genre = random.choice(genres)
-    publisher = random.choice(publishers)
-    year = random.randint(1950, 2025)
-    pages = random.randint(150, 800)
-    rating = round(random.uniform(3.5, 5.0), 1)
-    reviews_count = random.randint(100, 50000)
-    isbn = f"978-{random.randint(0, 9)}-{random.randint(100, 999)}-{random.randint(10000, 99999)}-{random.randint(0, 9)}"
-    theme = random.choice(themes)
-    summary = random.choice(plot_templates).format(theme=theme)
+
+def read_records(path: str, format: str = "auto") -> Iterator[dict]:
+    """Stream rows from a CSV (with a header) or JSON Lines file."""
+    if format == "auto":
+        format = "csv" if path.lower().endswith(".csv") else "jsonl"
+    with open(path, newline="", encoding="utf-8") as f:
+        if format == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def synthetic_records(count: int) -> Iterator[dict]:
+    """``count`` stable synthetic books, generated a batch at a time.
+
+    Details come from ``synthetic_books``; ISBNs are numbered sequentially
+    instead, since random ones collide at this scale.
+    """
+    for start in range(0, count, IMPORT_BATCH_SIZE):
+        numbers = np.arange(start, min(start + IMPORT_BATCH_SIZE, count))
+        titles = [f"Synthetic Book {i}" for i in numbers.tolist()]
+        books = synthetic_books(titles)
+        rows = zip(
+            titles,
+            books["author"].tolist(),
+            isbn13(numbers).tolist(),
+            books["publication_year"].tolist(),
+            books["theme"].tolist(),
+            books["plot"].tolist(),
+        )
+        for title, author, isbn, year, theme, plot in rows:
+            yield {
+                "title": title,
+                "author": BOOK_AUTHORS[author],
+                "isbn": format_isbn(isbn),
+                "year": year,
+                "summary": PLOT_TEMPLATES[plot].format(theme=PLOT_THEMES[theme]),
+            }
+
+
+def parse_record(row: dict) -> tuple | str:
+    """Validate one input row into a catalog record, or describe the problem."""
+    if not isinstance(row, dict):
+        return "record must be an object"
+    title, author, isbn = (str(row.get(k) or "").strip() for k in IMPORT_REQUIRED)
+    if not (title and author and isbn):
+        return "title, author and isbn are required"
+    try:
+        year = int(row.get("year") or 0)
+        copies = int(row.get("copies") or 1)
+    except (TypeError, ValueError):
+        return "year and copies must be integers"
+    if copies < 1:
+        return "copies must be at least 1"
+    return title, author, isbn, year, copies, str(row.get("summary") or "")
+
+
+def import_records(
+    rows: Iterable[dict],
+    batch_size: int = IMPORT_BATCH_SIZE,
+    on_progress: Callable[[ImportReport], None] | None = None,
+) -> ImportReport:
+    """Load ``rows`` into the catalog in batches, then index them in one pass.
+
+    Rows read before an error are still loaded and indexed.
+    """
+    report = ImportReport()
+    batch: list[tuple] = []
+
+    def flush() -> None:
+        report.duplicates += CATALOG.add_many(batch)
+        report.imported = report.read - report.invalid - report.duplicates
+        batch.clear()
+        if on_progress is not None:
+            on_progress(report)
+
+    try:
+        for row in rows:
+            report.read += 1
+            record = parse_record(row)
+            if isinstance(record, str):
+                report.invalid += 1
+                if len(report.errors) < MAX_IMPORT_ERRORS:
+                    report.errors.append(f"record {report.read}: {record}")
+                continue
+            batch.append(record)
+            if len(batch) >= batch_size:
+                flush()
+    finally:
+        if batch:
+            flush()
+        CATALOG.index_pending()
+    return report
+
+
+@mcp.tool(
+    name="import_books",
+    description=(
+        "Bulk import books into the catalog from a CSV or JSON Lines file in the "
+        "server's import directory, reporting progress after every batch."
+    ),
+)
+async def import_books(
+    path: Annotated[
+        str,
+        Field(
+            description="Path, relative to the server's import directory, of a "
+            "CSV (with header) or .jsonl file with title, author, isbn, year and "
+            "optional copies and summary"
+        ),
+    ],
+    format: Annotated[
+        Literal["auto", "csv", "jsonl"],
+        Field(description="File format; 'auto' picks by file extension"),
+    ] = "auto",
+    batch_size: Annotated[
+        int, Field(description="Records per batch", ge=100, le=100_000)
+    ] = IMPORT_BATCH_SIZE,
+    ctx: Context | None = None,
+) -> dict:
+    print(f"[green]invoking tool:import_books path={path}[/green]")
+
+    resolved = import_path(path)
+    if resolved is None:
+        return {
+            "status": "rejected",
+            "path": path,
+            "reason": "Path is outside the import directory",
+        }
+    if not os.path.isfile(resolved):
+        return {"status": "not_found", "path": path, "message": "No such file"}
+
+    loop = asyncio.get_running_loop()
+
+    def progress(report: ImportReport) -> None:
+        if ctx is not None:
+            asyncio.run_coroutine_threadsafe(
+                ctx.report_progress(report.read, message=f"{report.imported} imported"),
+                loop,
+            )
+
+    try:
+        report = await asyncio.to_thread(
+            import_records, read_records(resolved, format), batch_size, progress
+        )
+    except (OSError, UnicodeDecodeError, json.JSONDecodeError, csv.Error) as exc:
+        return {"status": "failed", "path": path, "reason": str(exc)}
 
     return {
-        "title": title,
-        "author": author,
-        "genre": genre,
-        "publisher": publisher,
-        "publication_year": year,
-        "pages": pages,
-        "isbn": isbn,
-        "rating": rating,
-        "reviews_count": reviews_count,
-        "summary": summary,
-        "language": "English",
-        "format": random.choice(["Hardcover", "Paperback", "eBook", "Audiobook"]),
-        "price": round(random.uniform(9.99, 34.99), 2),
+        "status": "imported",
+        "path": path,
+        **report.to_dict(),
+        "catalog_size": len(CATALOG),
     }
 
 
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--import",
+        dest="imports",
+        action="append",
+        default=[],
+        metavar="PATH",
+        help="CSV or JSON Lines file of books to load before serving (repeatable)",
+    )
+    parser.add_argument(
+        "--synthetic",
+        type=int,
+        default=0,
+        metavar="N",
+        help="also load N deterministic synthetic books",
+    )
+    parser.add_argument(
+        "--no-serve",
+        action="store_true",
+        help="exit after importing instead of starting the server",
+    )
+    args = parser.parse_args()
+
+    def progress(report: ImportReport) -> None:
+        print(f"  {report.read:>10,} read  {report.imported:>10,} imported")
+
+    sources = [(path, read_records(path)) for path in args.imports]
+    if args.synthetic:
+        sources.append(
+            (f"{args.synthetic:,} synthetic books", synthetic_records(args.synthetic))
+        )
+    # Cyclic GC passes over millions of new, acyclic records slow a bulk load
+    # down. Nothing else runs before the server starts, so collect once at the
+    # end and freeze the survivors instead.
+    gc.disable()
+    try:
+        for label, rows in sources:
+            print(f"[green]Importing {label}[/green]")
+            print(import_records(rows, on_progress=progress).to_dict())
+    finally:
+        gc.enable()
+        gc.collect()
+        gc.freeze()
+    print(f"Catalog holds {len(CATALOG):,} books")
+
+    if not args.no_serve:
+        host = os.getenv("MCP_HOST", "0.0.0.0")
+        port = int(os.getenv("MCP_PORT", "9000"))
+        mcp.run(transport="http", host=host, port=port)
+
+
 if __name__ == "__main__":
-    host = os.getenv("MCP_HOST", "0.0.0.0")
-    port = int(os.getenv("MCP_PORT", "9000"))
-    mcp.run(transport="http", host=host, port=port)
+    main()
@@ -4,18 +4,38 @@ This server provides stock price queries, trading operations (buy/sell),
 portfolio management, and market analysis capabilities.
 """
 
-import random
-from datetime import datetime, timedelta, timezone
+import asyncio
+import bisect
+import contextlib
+import csv
+import functools
+import heapq
+import itertools
+import json
+import logging
+import math
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 import os
-from typing import Annotated
+import zlib
+from typing import Annotated, AsyncIterator, Callable, Literal
+from zoneinfo import ZoneInfo
 
-from fastmcp import FastMCP
+import numpy as np
+from fastmcp import Context, FastMCP
+from market_calendar import ExchangeCalendar
 from pydantic import Field
 from rich import print
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
 
 mcp = FastMCP(
     name="Stock Trading MCP Server",
 )
+log = logging.getLogger(__name__)
 
 # Mock stock data
 STOCK_DATA = {
@@ -56,13 +76,1409 @@ STOCK_DATA = {
 }
 
 
+def symbol_seed(symbol: str) -> int:
+    """Stable per-symbol seed so every process generates the same series."""
+    return zlib.crc32(symbol.upper().encode("utf-8"))
+
+
+# Price tick store
+TICK_INTERVAL_SECONDS = float(os.getenv("STOCK_TICK_SECONDS", "1.0"))
+SIM_SEED = int(os.getenv("STOCK_SIM_SEED", "0"))
+SIM_CAPACITY = int(os.getenv("STOCK_SIM_CAPACITY", "65536"))
+# Market time simulated per tick; one trading minute keeps quotes visibly moving.
+SIM_SECONDS_PER_TICK = float(os.getenv("STOCK_SIM_SECONDS_PER_TICK", "60"))
+TRADING_SECONDS_PER_SESSION = 6.5 * 3600
+TRADING_SECONDS_PER_YEAR = 252 * TRADING_SECONDS_PER_SESSION
+# A simulated session closes every this many ticks (390 at the defaults, so
+# about six and a half real minutes).
+SIM_TICKS_PER_SESSION = max(
+    1, round(TRADING_SECONDS_PER_SESSION / SIM_SECONDS_PER_TICK)
+)
+SIM_ANNUAL_DRIFT = 0.07
+SIM_VOLATILITY_RANGE = (0.15, 0.60)  # annualized, drawn per symbol
+SIM_MARKET_LOADING_RANGE = (0.30, 0.55)
+SIM_SECTOR_LOADING_RANGE = (0.25, 0.50)
+SIM_SECTOR_FACTORS = 64
+SIM_VOLUME_PER_TICK = 25_000
+MAX_CATCH_UP_TICKS = 100
+# Published snapshots stay valid while fewer than this many newer ticks exist.
+SNAPSHOT_BUFFERS = 3
+
+
+@dataclass(frozen=True)
+class TickSnapshot:
+    """Read-only views of every symbol's price at one tick.
+
+    The arrays are views into one of the store's ``SNAPSHOT_BUFFERS`` reused
+    slots, not copies: they stay valid only until that many newer ticks
+    have been published. Use a snapshot within the call or listener that
+    received it, and copy anything that must outlive it.
+    """
+
+    tick: int
+    timestamp: datetime
+    prices: np.ndarray
+    previous_close: np.ndarray
+    day_high: np.ndarray
+    day_low: np.ndarray
+    volume: np.ndarray
+
+
+class PriceTickStore:
+    """Correlated multi-asset simulator advanced on a fixed clock.
+
+    Each tick moves every symbol by one vectorized geometric Brownian motion
+    step whose shock mixes a market factor, a per-sector factor and
+    idiosyncratic noise, so symbols in the same sector move together. All
+    arrays are preallocated for ``capacity`` symbols and reused: a tick is
+    written into the next of ``SNAPSHOT_BUFFERS`` rotating slots, and the
+    published ``TickSnapshot`` holds views into that slot. Given the same
+    ``seed`` and registration order, the price path is identical; each
+    symbol's model parameters come from its own generator seeded with
+    ``(seed, symbol_seed(symbol))``, so registering never consumes the
+    draws that drive the ticks.
+
+    Every ``SIM_TICKS_PER_SESSION`` ticks the simulated session closes: the
+    last prices become ``previous_close`` and the day's high, low and
+    volume start over from them.
+    """
+
+    def __init__(
+        self,
+        interval: float = TICK_INTERVAL_SECONDS,
+        seed: int = SIM_SEED,
+        capacity: int = SIM_CAPACITY,
+    ):
+        self.interval = interval
+        self.capacity = capacity
+        self.seed = seed
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self._index: dict[str, int] = {}
+        self._sectors: dict[str, int] = {}
+        self.symbols: list[str] = []
+        self._started_at = time.monotonic()
+        self._thread: threading.Thread | None = None
+        self._listeners: list[Callable[[TickSnapshot], None]] = []
+
+        slots = (SNAPSHOT_BUFFERS, capacity)
+        self._prices = np.empty(slots)
+        self._high = np.empty(slots)
+        self._low = np.empty(slots)
+        self._volume = np.zeros(slots, dtype=np.int64)
+        self._previous_close = np.empty(slots)
+        self._slot = 0
+        # Per-symbol model parameters, fixed at registration.
+        dt = SIM_SECONDS_PER_TICK / TRADING_SECONDS_PER_YEAR
+        self._dt = dt
+        self._drift = np.empty(capacity)
+        self._vol = np.empty(capacity)
+        self._market_w = np.empty(capacity)
+        self._sector_w = np.empty(capacity)
+        self._idio_w = np.empty(capacity)
+        self._sector_of = np.zeros(capacity, dtype=np.intp)
+        # Scratch space for one step.
+        self._shock = np.empty(capacity)
+        self._scratch = np.empty(capacity)
+        self._factors = np.empty(SIM_SECTOR_FACTORS + 1)
+        self._snapshot = self._publish(0, 0)
+
+    def register(self, symbol: str, base_price: float) -> int:
+        """Add ``symbol`` to the store, returning its array index."""
+        self.register_many({symbol: base_price})
+        return self._index[symbol]
+
+    def register_many(self, base_prices: dict[str, float]) -> None:
+        """Add several symbols, drawing each one's volatility and factor loadings."""
+        with self._lock:
+            new = {s: p for s, p in base_prices.items() if s not in self._index}
+            if not new:
+                return
+            start = len(self.symbols)
+            end = start + len(new)
+            if end > self.capacity:
+                raise ValueError(
+                    f"tick store is full ({self.capacity} symbols); "
+                    "raise STOCK_SIM_CAPACITY"
+                )
+            added = np.fromiter(new.values(), dtype=float, count=len(new))
+            for offset, symbol in enumerate(new):
+                self._index[symbol] = start + offset
+                # Column 0 of the factor draw is the market; sectors follow.
+                self._sector_of[start + offset] = 1 + self._sector_code(symbol)
+            self.symbols.extend(new)
+
+            # Later slots only matter once a tick publishes them, so fill all.
+            rows = slice(start, end)
+            self._prices[:, rows] = added
+            self._high[:, rows] = added
+            self._low[:, rows] = added
+            self._volume[:, rows] = 0
+            self._previous_close[:, rows] = added
+
+            vol, market_w, sector_w = np.array(
+                [self._model_parameters(symbol) for symbol in new]
+            ).T
+            self._vol[rows] = vol * np.sqrt(self._dt)
+            self._drift[rows] = (SIM_ANNUAL_DRIFT - vol**2 / 2) * self._dt
+            self._market_w[rows] = market_w
+            self._sector_w[rows] = sector_w
+            self._idio_w[rows] = np.sqrt(1 - market_w**2 - sector_w**2)
+
+            snap = self._snapshot
+            self._snapshot = self._publish(snap.tick, self._slot, snap.timestamp)
+
+    def _model_parameters(self, symbol: str) -> tuple[float, float, float]:
+        """Volatility, market loading and sector loading drawn for ``symbol``."""
+        rng = np.random.default_rng((self.seed, symbol_seed(symbol)))
+        return (
+            rng.uniform(*SIM_VOLATILITY_RANGE),
+            rng.uniform(*SIM_MARKET_LOADING_RANGE),
+            rng.uniform(*SIM_SECTOR_LOADING_RANGE),
+        )
+
+    def _sector_code(self, symbol: str) -> int:
+        """Factor column for the symbol's sector; overflow sectors share columns."""
+        sector = symbol_sector(symbol)
+        code = self._sectors.get(sector)
+        if code is None:
+            if len(self._sectors) < SIM_SECTOR_FACTORS:
+                code = len(self._sectors)
+            else:
+                code = zlib.crc32(sector.encode()) % SIM_SECTOR_FACTORS
+            self._sectors[sector] = code
+        return code
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._index
+
+    def index_of(self, symbol: str) -> int:
+        """Return the array index of a registered ``symbol``."""
+        return self._index[symbol]
+
+    def add_listener(self, listener: Callable[[TickSnapshot], None]) -> None:
+        """Call ``listener`` with every newly published snapshot."""
+        self._listeners.append(listener)
+
+    def snapshot(self) -> TickSnapshot:
+        """Return the current snapshot, catching up if the clock has moved on."""
+        due = int((time.monotonic() - self._started_at) // self.interval)
+        if due > self._snapshot.tick:
+            self.advance(due)
+        return self._snapshot
+
+    def advance(self, target_tick: int) -> None:
+        """Step prices forward until ``target_tick`` has been reached."""
+        with self._lock:
+            steps = target_tick - self._snapshot.tick
+            if steps <= 0:
+                return
+            n = len(self.symbols)
+            src, dst = self._slot, (self._slot + 1) % SNAPSHOT_BUFFERS
+            buffers = (
+                self._prices,
+                self._previous_close,
+                self._high,
+                self._low,
+                self._volume,
+            )
+            for buf in buffers:
+                buf[dst, :n] = buf[src, :n]
+            prices, close, high, low, volume = (buf[dst, :n] for buf in buffers)
+            shock = self._shock[:n]
+            sector_of = self._sector_of[:n]
+            # Bound catch-up work after long idle periods.
+            first = target_tick - min(steps, MAX_CATCH_UP_TICKS)
+            if (
+                first // SIM_TICKS_PER_SESSION
+                > self._snapshot.tick // SIM_TICKS_PER_SESSION
+            ):
+                # A session closed during the ticks skipped over.
+                self._close_session(prices, close, high, low, volume)
+            for tick in range(first + 1, target_tick + 1):
+                self._step(n, prices, shock, sector_of)
+                np.maximum(high, prices, out=high)
+                np.minimum(low, prices, out=low)
+                # Volume rises with the size of the move.
+                np.abs(shock, out=shock)
+                shock += 1
+                shock *= SIM_VOLUME_PER_TICK
+                np.add(volume, shock, out=volume, casting="unsafe")
+                if tick % SIM_TICKS_PER_SESSION == 0:
+                    self._close_session(prices, close, high, low, volume)
+            self._slot = dst
+            self._snapshot = self._publish(target_tick, dst)
+            published = self._snapshot
+        for listener in self._listeners:
+            # One failing listener must not starve the rest or stop the clock.
+            try:
+                listener(published)
+            except Exception:
+                log.exception(
+                    "Tick listener %r failed on tick %d", listener, target_tick
+                )
+
+    @staticmethod
+    def _close_session(
+        prices: np.ndarray,
+        close: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        volume: np.ndarray,
+    ) -> None:
+        """Roll the day's fields over: the next session opens at ``prices``."""
+        close[:] = prices
+        high[:] = prices
+        low[:] = prices
+        volume[:] = 0
+
+    def _step(
+        self, n: int, prices: np.ndarray, shock: np.ndarray, sector_of: np.ndarray
+    ) -> None:
+        """One correlated GBM step over the first ``n`` symbols, in place.
+
+        Leaves the symbols' combined standard-normal shock in ``shock``.
+        """
+        factors, tmp = self._factors, self._scratch[:n]
+        self._rng.standard_normal(out=factors)
+        self._rng.standard_normal(out=shock)
+        shock *= self._idio_w[:n]
+        np.multiply(self._market_w[:n], factors[0], out=tmp)
+        shock += tmp
+        np.take(factors, sector_of, out=tmp)
+        tmp *= self._sector_w[:n]
+        shock += tmp
+        # Log return = drift + vol * shock, applied as a multiplicative step.
+        np.multiply(self._vol[:n], shock, out=tmp)
+        tmp += self._drift[:n]
+        prices *= np.exp(tmp, out=tmp)
+
+    def _publish(
+        self, tick: int, slot: int, timestamp: datetime | None = None
+    ) -> TickSnapshot:
+        n = len(self.symbols)
+        views = [
+            buf[slot, :n]
+            for buf in (
+                self._prices,
+                self._previous_close,
+                self._high,
+                self._low,
+                self._volume,
+            )
+        ]
+        for view in views:
+            view.flags.writeable = False
+        prices, previous_close, high, low, volume = views
+        return TickSnapshot(
+            tick=tick,
+            timestamp=timestamp or datetime.now(timezone.utc),
+            prices=prices,
+            previous_close=previous_close,
+            day_high=high,
+            day_low=low,
+            volume=volume,
+        )
+
+    def start(self) -> None:
+        """Advance prices from a background thread on the fixed tick clock."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            elapsed = time.monotonic() - self._started_at
+            time.sleep(self.interval - elapsed % self.interval)
+            try:
+                self.advance(
+                    int((time.monotonic() - self._started_at) // self.interval)
+                )
+            except Exception:
+                log.exception("Price tick failed; retrying on the next interval")
+
+
+def fallback_base_price(symbol: str) -> float:
+    """Deterministic base price in [10, 500) for tickers not in STOCK_DATA."""
+    return round(10.0 + (symbol_seed(symbol) % 49_000) / 100, 2)
+
+
+FALLBACK_SECTORS = ("Technology", "Financial", "Healthcare", "Energy")
+
+
+def symbol_sector(symbol: str) -> str:
+    """STOCK_DATA sector, or a stable pick for tickers outside the universe."""
+    if symbol in STOCK_DATA:
+        return STOCK_DATA[symbol]["sector"]
+    return FALLBACK_SECTORS[symbol_seed(symbol) % len(FALLBACK_SECTORS)]
+
+
+# Symbol universe and search index
+STOCK_UNIVERSE_CSV = os.getenv("STOCK_UNIVERSE_CSV")
+SEARCH_NGRAM = 3
+
+
+def load_universe(path: str) -> dict[str, dict]:
+    """Read a ``symbol,name,sector,base_price`` CSV into STOCK_DATA's shape."""
+    universe = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            symbol = row["symbol"].strip().upper()
+            universe[symbol] = {
+                "name": row["name"].strip(),
+                "base_price": float(
+                    row.get("base_price") or fallback_base_price(symbol)
+                ),
+                "sector": (row.get("sector") or "Unknown").strip(),
+            }
+    return universe
+
+
+def ngrams(text: str, n: int = SEARCH_NGRAM) -> set[str]:
+    return {text[i : i + n] for i in range(len(text) - n + 1)}
+
+
+class SymbolIndex:
+    """Prebuilt prefix and trigram indexes over symbols and company names.
+
+    Prefix lookups bisect sorted symbol and name-word arrays. Substring
+    lookups walk the rarest query trigram's postings in rank order, checking
+    the other trigrams by set membership, and stop once ``limit`` is reached.
+    """
+
+    def __init__(self, stocks: dict[str, dict]):
+        self._names = {symbol: data["name"] for symbol, data in stocks.items()}
+        self._folded = {
+            symbol: f"{symbol} {name}".lower() for symbol, name in self._names.items()
+        }
+        self._symbols = sorted(symbol.lower() for symbol in stocks)
+        self._symbol_keys = {symbol.lower(): symbol for symbol in stocks}
+        self._words = sorted(
+            (word, symbol)
+            for symbol, name in self._names.items()
+            for word in name.lower().split()
+        )
+        self._word_keys = [word for word, _ in self._words]
+        # Postings are appended in rank order (shortest symbol first) so
+        # substring scans can stop at ``limit``; sets answer membership.
+        self._gram_lists: dict[str, list[str]] = {}
+        for symbol in sorted(self._folded, key=lambda s: (len(s), s)):
+            for gram in ngrams(self._folded[symbol]):
+                self._gram_lists.setdefault(gram, []).append(symbol)
+        self._gram_sets = {gram: set(l) for gram, l in self._gram_lists.items()}
+
+    def search(self, query: str, limit: int) -> list[str]:
+        """Return up to ``limit`` symbols, best matches first.
+
+        Ranking: exact symbol, symbol prefix, name-word prefix, then any
+        substring of at least three characters (shortest symbols first).
+        """
+        q = query.strip().lower()
+        if not q or limit <= 0:
+            return []
+        results: dict[str, None] = {}
+
+        def take(symbols) -> bool:
+            for symbol in symbols:
+                results.setdefault(symbol)
+                if len(results) >= limit:
+                    return True
+            return False
+
+        if q in self._symbol_keys and take([self._symbol_keys[q]]):
+            return list(results)
+
+        start = bisect.bisect_left(self._symbols, q)
+        end = bisect.bisect_left(self._symbols, q + "\uffff")
+        if take(self._symbol_keys[self._symbols[i]] for i in range(start, end)):
+            return list(results)
+
+        start = bisect.bisect_left(self._word_keys, q)
+        end = bisect.bisect_left(self._word_keys, q + "\uffff")
+        if take(self._words[i][1] for i in range(start, end)):
+            return list(results)
+
+        grams = sorted(ngrams(q), key=lambda g: len(self._gram_sets.get(g, ())))
+        if grams and grams[0] in self._gram_sets:
+            others = [self._gram_sets.get(g, set()) for g in grams[1:]]
+            take(
+                symbol
+                for symbol in self._gram_lists[grams[0]]
+                if symbol not in results
+                and all(symbol in postings for postings in others)
+                and q in self._folded[symbol]
+            )
+        return list(results)
+
+
+if STOCK_UNIVERSE_CSV:
+    STOCK_DATA.update(load_universe(STOCK_UNIVERSE_CSV))
+
+TICK_STORE = PriceTickStore()
+TICK_STORE.register_many({s: data["base_price"] for s, data in STOCK_DATA.items()})
+SYMBOL_INDEX = SymbolIndex(STOCK_DATA)
+
+
 def get_mock_price(symbol: str) -> float:
-    """Generate a mock price with some random variation."""
-    if symbol not in STOCK_DATA:
-        return round(random.uniform(10.0, 500.0), 2)
-    base = STOCK_DATA[symbol]["base_price"]
-    variation = random.uniform(-0.05, 0.05)  # ±5% variation
-    return round(base * (1 + variation), 2)
+    """Return the symbol's price at the current tick."""
+    idx = TICK_STORE.index_of(symbol)
+    return round(float(TICK_STORE.snapshot().prices[idx]), 2)
+
+
+def normalize_symbol(symbol: str) -> str:
+    """Tickers match case-insensitively and ignore surrounding spaces."""
+    return symbol.strip().upper()
+
+
+def resolve_symbols(symbols: list[str]) -> tuple[list[str], list[str]]:
+    """Normalize and de-duplicate ``symbols``, split into known and unknown."""
+    known, unknown = [], []
+    for symbol in dict.fromkeys(map(normalize_symbol, symbols)):
+        (known if symbol in TICK_STORE else unknown).append(symbol)
+    return known, unknown
+
+
+def symbol_not_found(symbol: str) -> dict:
+    return {"status": "not_found", "symbol": symbol, "reason": "Unknown ticker"}
+
+
+def symbols_not_found(symbols: list[str]) -> dict:
+    return {"status": "not_found", "symbols": symbols, "reason": "Unknown tickers"}
+
+
+def symbol_indices(symbols: list[str]) -> np.ndarray:
+    """Map registered symbols to tick store indices."""
+    return np.fromiter(
+        (TICK_STORE.index_of(symbol) for symbol in symbols),
+        dtype=np.intp,
+        count=len(symbols),
+    )
+
+
+def current_prices(symbols: list[str]) -> np.ndarray:
+    """Prices for ``symbols`` at the current tick."""
+    idx = symbol_indices(symbols)
+    return TICK_STORE.snapshot().prices[idx]
+
+
+# Historical price engine
+CALENDAR_YEARS_BACK = 30
+CALENDAR_YEARS_AHEAD = 2
+HISTORY_DAILY_VOLATILITY = 0.018
+HISTORY_GAP_VOLATILITY = 0.004
+HISTORY_RANGE_VOLATILITY = 0.008
+
+
+_this_year = datetime.now(timezone.utc).year
+NYSE_CALENDAR = ExchangeCalendar(
+    _this_year - CALENDAR_YEARS_BACK, _this_year + CALENDAR_YEARS_AHEAD
+)
+
+
+def previous_close(symbol: str) -> float:
+    """Last session's close, which anchors the symbol's daily history."""
+    idx = TICK_STORE.index_of(symbol)
+    return float(TICK_STORE.snapshot().previous_close[idx])
+
+
+def generate_ohlcv(symbol: str, days: int, last_close: float) -> dict[str, np.ndarray]:
+    """Generate ``days`` daily OHLCV bars ending at ``last_close`` in one pass.
+
+    The random walk is drawn newest-first from a per-symbol seed, so a
+    shorter window is always the tail of a longer one.
+    """
+    rng = np.random.default_rng(symbol_seed(symbol))
+    noise = rng.standard_normal((days, 4))
+    volume_noise = rng.standard_normal(days)
+
+    # Newest-first log returns, walked back from the anchor close.
+    returns = noise[:, 0] * HISTORY_DAILY_VOLATILITY
+    log_close = np.log(last_close) - np.concatenate(([0.0], np.cumsum(returns[:-1])))
+    close = np.exp(log_close)[::-1]
+    returns = returns[::-1]
+    noise = noise[::-1]
+
+    prev_close = np.empty(days)
+    prev_close[1:] = close[:-1]
+    prev_close[:1] = close[:1] * np.exp(-returns[:1])
+    open_ = prev_close * np.exp(noise[:, 1] * HISTORY_GAP_VOLATILITY)
+    high = np.maximum(open_, close) * (
+        1 + np.abs(noise[:, 2]) * HISTORY_RANGE_VOLATILITY
+    )
+    low = np.minimum(open_, close) * (
+        1 - np.abs(noise[:, 3]) * HISTORY_RANGE_VOLATILITY
+    )
+
+    base_volume = 20_000_000 + symbol_seed(symbol) % 60_000_000
+    volume = (base_volume * np.exp(volume_noise[::-1] * 0.25)).astype(np.int64)
+
+    return {"open": open_, "high": high, "low": low, "close": close, "volume": volume}
+
+
+def history_dates(days: int) -> np.ndarray:
+    """Return up to ``days`` trading sessions before today, oldest first."""
+    today = datetime.now(ZoneInfo(NYSE_CALENDAR.timezone)).date()
+    return NYSE_CALENDAR.sessions_before(today, days)
+
+
+# Sector index
+SECTOR_TOP_MOVERS = 5
+
+
+class SectorIndex:
+    """Symbol sets per sector plus aggregates refreshed on every tick.
+
+    Each tick computes change percentages once for all symbols and reduces
+    them per sector with ``bincount``; ``summary`` then just returns the
+    latest precomputed result.
+    """
+
+    def __init__(self, store: PriceTickStore):
+        self._store = store
+        self._lock = threading.Lock()
+        self.members: dict[str, set[str]] = {}
+        self._sectors: list[str] = []
+        self._sector_codes: dict[str, int] = {}
+        self._codes = np.empty(0, dtype=np.intp)
+        self._summary: tuple[int, dict[str, dict]] = (-1, {})
+        store.add_listener(self.on_tick)
+        self.on_tick(store.snapshot())
+
+    def summary(self) -> tuple[int, dict[str, dict]]:
+        """The latest ``(tick, {sector: aggregates})``."""
+        snap = self._store.snapshot()
+        if snap.tick != self._summary[0] or len(snap.prices) != len(self._codes):
+            self.on_tick(snap)
+        return self._summary
+
+    def on_tick(self, snap: TickSnapshot) -> None:
+        with self._lock:
+            self._sync_codes(len(snap.prices))
+            codes = self._codes[: len(snap.prices)]
+            change = (snap.prices / snap.previous_close - 1) * 100
+            count = len(self._sectors)
+            members = np.bincount(codes, minlength=count)
+            mean = np.bincount(codes, change, minlength=count) / np.maximum(members, 1)
+            advancers = np.bincount(codes, change > 0, minlength=count)
+            decliners = np.bincount(codes, change < 0, minlength=count)
+
+            # Sort by (sector, change) once; each sector is then a contiguous run.
+            order = np.lexsort((change, codes))
+            bounds = np.searchsorted(codes[order], np.arange(count + 1))
+            summary = {}
+            for code, sector in enumerate(self._sectors):
+                run = order[bounds[code] : bounds[code + 1]]
+                summary[sector] = {
+                    "symbols": int(members[code]),
+                    "average_change_percent": round(float(mean[code]), 2),
+                    "advancers": int(advancers[code]),
+                    "decliners": int(decliners[code]),
+                    "breadth": round(
+                        float(advancers[code] - decliners[code])
+                        / max(int(members[code]), 1),
+                        2,
+                    ),
+                    "top_gainers": self._movers(run[::-1], change, 1),
+                    "top_losers": self._movers(run, change, -1),
+                }
+            self._summary = (snap.tick, summary)
+
+    def _sync_codes(self, size: int) -> None:
+        """Assign sector codes to symbols registered since the last tick."""
+        if size <= len(self._codes):
+            return
+        new_codes = []
+        for symbol in self._store.symbols[len(self._codes) : size]:
+            sector = symbol_sector(symbol)
+            if sector not in self._sector_codes:
+                self._sector_codes[sector] = len(self._sectors)
+                self._sectors.append(sector)
+                self.members[sector] = set()
+            self.members[sector].add(symbol)
+            new_codes.append(self._sector_codes[sector])
+        self._codes = np.concatenate((self._codes, np.array(new_codes, np.intp)))
+
+    def _movers(self, run: np.ndarray, change: np.ndarray, sign: int) -> list[dict]:
+        """First symbols in ``run`` whose change has the given sign."""
+        movers = []
+        for i in run[:SECTOR_TOP_MOVERS]:
+            if np.sign(change[i]) != sign:
+                break
+            movers.append(
+                {
+                    "symbol": self._store.symbols[i],
+                    "change_percent": round(float(change[i]), 2),
+                }
+            )
+        return movers
+
+
+SECTOR_INDEX = SectorIndex(TICK_STORE)
+
+
+# Order book and matching engine
+COMMISSION_RATE = 0.001  # 0.1% commission
+OPEN_ORDER_STATUSES = ("pending",)
+
+
+def commission_for(price: float, quantity: int) -> float:
+    return round(price * quantity * COMMISSION_RATE, 2)
+
+
+def buy_cost(price: float, quantity: int) -> float:
+    """Cash a buy of ``quantity`` at ``price`` takes, commission included."""
+    price = round(price, 2)
+    return round(price * quantity + commission_for(price, quantity), 2)
+
+
+@dataclass
+class Order:
+    """A single buy or sell order tracked by the order book."""
+
+    order_id: str
+    symbol: str
+    side: Literal["buy", "sell"]
+    order_type: Literal["market", "limit", "stop"]
+    quantity: int
+    limit_price: float | None = None
+    stop_price: float | None = None
+    status: str = "pending"
+    filled_quantity: int = 0
+    fill_price: float | None = None
+    commission: float = 0.0
+    reason: str | None = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    def to_dict(self) -> dict:
+        result = {
+            "order_id": self.order_id,
+            "status": self.status,
+            "symbol": self.symbol,
+            "order_type": self.order_type,
+            "side": self.side,
+            "quantity": self.quantity,
+            "filled_quantity": self.filled_quantity,
+            "price": self.fill_price,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+        }
+        if self.limit_price is not None:
+            result["limit_price"] = self.limit_price
+        if self.stop_price is not None:
+            result["stop_price"] = self.stop_price
+        if self.reason is not None:
+            result["reason"] = self.reason
+        return result
+
+
+@dataclass
+class SymbolBook:
+    """Trigger heaps for one symbol's resting orders.
+
+    Each heap is ordered so its root is the first order to trigger: buy
+    limits fill at or below the limit (max-heap), sell limits at or above
+    it (min-heap), buy stops trigger at or above the stop (min-heap) and
+    sell stops at or below it (max-heap). Entries are ``(key, seq, order_id)``.
+    """
+
+    buy_limits: list = field(default_factory=list)
+    sell_limits: list = field(default_factory=list)
+    buy_stops: list = field(default_factory=list)
+    sell_stops: list = field(default_factory=list)
+
+
+class OrderBook:
+    """Stateful order store matched against the tick store's prices.
+
+    Orders are indexed by id for O(1) lookups. Resting limit and stop orders
+    sit in per-symbol heaps; each tick only inspects heap roots, so
+    evaluation costs O(symbols with orders + fills * log n). Cancelled
+    orders are removed lazily when they surface at a heap root.
+    """
+
+    def __init__(self, store: PriceTickStore):
+        self._store = store
+        self._lock = threading.Lock()
+        self._orders: dict[str, Order] = {}
+        self._books: dict[str, SymbolBook] = {}
+        self._ids = itertools.count(1)
+        self._seq = itertools.count()
+        self._fill_listeners: list[Callable[[Order], None]] = []
+        self._cancel_listeners: list[Callable[[Order], None]] = []
+        self._fill_check: Callable[[Order, float], str | None] = (
+            lambda order, price: None
+        )
+        store.add_listener(self.on_tick)
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def add_fill_listener(self, listener: Callable[[Order], None]) -> None:
+        """Call ``listener`` with every order as it is executed."""
+        self._fill_listeners.append(listener)
+
+    def add_cancel_listener(self, listener: Callable[[Order], None]) -> None:
+        """Call ``listener`` with every order cancelled or rejected unfilled."""
+        self._cancel_listeners.append(listener)
+
+    def set_fill_check(self, check: Callable[[Order, float], str | None]) -> None:
+        """Run ``check(order, price)`` before each fill; a reason rejects it."""
+        self._fill_check = check
+
+    def get(self, order_id: str) -> Order | None:
+        return self._orders.get(order_id)
+
+    def resume_ids(self, last: int) -> None:
+        """Number new orders after ``last`` so ids stay unique across restarts."""
+        with self._lock:
+            self._ids = itertools.count(last + 1)
+
+    def submit(
+        self,
+        symbol: str,
+        side: Literal["buy", "sell"],
+        order_type: Literal["market", "limit", "stop"],
+        quantity: int,
+        limit_price: float | None = None,
+        stop_price: float | None = None,
+    ) -> Order:
+        """Create an order and execute it now if it is already marketable."""
+        idx = self._store.index_of(symbol)
+        price = float(self._store.snapshot().prices[idx])
+        with self._lock:
+            order = Order(
+                order_id=f"ORD-{next(self._ids):08d}",
+                symbol=symbol,
+                side=side,
+                order_type=order_type,
+                quantity=quantity,
+                limit_price=limit_price,
+                stop_price=stop_price,
+            )
+            self._orders[order.order_id] = order
+            if order_type == "market" or self._is_triggered(order, price):
+                self._execute(order, price)
+            else:
+                self._rest(order)
+        if order.status not in OPEN_ORDER_STATUSES:
+            self._notify(order)
+        return order
+
+    def cancel(self, order_id: str) -> Order | None:
+        """Cancel a pending order; its heap entry is discarded lazily."""
+        with self._lock:
+            order = self._orders.get(order_id)
+            if order is None or order.status not in OPEN_ORDER_STATUSES:
+                return order
+            order.status = "cancelled"
+            order.updated_at = datetime.now(timezone.utc)
+        self._notify(order)
+        return order
+
+    def on_tick(self, snapshot: TickSnapshot) -> None:
+        """Settle every resting order triggered by the snapshot's prices."""
+        settled: list[Order] = []
+        with self._lock:
+            for symbol, book in self._books.items():
+                idx = self._store.index_of(symbol)
+                # Registered after this snapshot was published: wait a tick.
+                if idx >= len(snapshot.prices):
+                    continue
+                price = float(snapshot.prices[idx])
+                settled += self._match(
+                    book.buy_limits, lambda key: price <= -key, price
+                )
+                settled += self._match(
+                    book.sell_limits, lambda key: price >= key, price
+                )
+                settled += self._match(book.buy_stops, lambda key: price >= key, price)
+                settled += self._match(
+                    book.sell_stops, lambda key: price <= -key, price
+                )
+        for order in settled:
+            self._notify(order)
+
+    def _match(
+        self, heap: list, triggered: Callable[[float], bool], price: float
+    ) -> list[Order]:
+        settled = []
+        while heap:
+            key, _, order_id = heap[0]
+            order = self._orders[order_id]
+            if order.status not in OPEN_ORDER_STATUSES:
+                heapq.heappop(heap)
+            elif triggered(key):
+                heapq.heappop(heap)
+                self._execute(order, price)
+                settled.append(order)
+            else:
+                break
+        return settled
+
+    @staticmethod
+    def _is_triggered(order: Order, price: float) -> bool:
+        if order.order_type == "limit":
+            if order.side == "buy":
+                return price <= order.limit_price
+            return price >= order.limit_price
+        if order.side == "buy":
+            return price >= order.stop_price
+        return price <= order.stop_price
+
+    def _rest(self, order: Order) -> None:
+        book = self._books.setdefault(order.symbol, SymbolBook())
+        seq = next(self._seq)
+        if order.order_type == "limit":
+            if order.side == "buy":
+                heapq.heappush(
+                    book.buy_limits, (-order.limit_price, seq, order.order_id)
+                )
+            else:
+                heapq.heappush(
+                    book.sell_limits, (order.limit_price, seq, order.order_id)
+                )
+        elif order.side == "buy":
+            heapq.heappush(book.buy_stops, (order.stop_price, seq, order.order_id))
+        else:
+            heapq.heappush(book.sell_stops, (-order.stop_price, seq, order.order_id))
+
+    def _execute(self, order: Order, price: float) -> None:
+        reason = self._fill_check(order, price)
+        if reason is None:
+            self._fill(order, price)
+        else:
+            order.status = "rejected"
+            order.reason = reason
+            order.updated_at = datetime.now(timezone.utc)
+
+    @staticmethod
+    def _fill(order: Order, price: float) -> None:
+        order.status = "executed"
+        order.filled_quantity = order.quantity
+        order.fill_price = round(price, 2)
+        order.commission = commission_for(order.fill_price, order.quantity)
+        order.updated_at = datetime.now(timezone.utc)
+
+    def _notify(self, order: Order) -> None:
+        if order.status == "executed":
+            listeners = self._fill_listeners
+        else:
+            listeners = self._cancel_listeners
+        for listener in listeners:
+            listener(order)
+
+
+ORDER_BOOK = OrderBook(TICK_STORE)
+
+
+# Portfolio ledger
+# Next to this file by default, so the ledger is the same wherever the
+# server is started from.
+PORTFOLIO_DB = os.getenv(
+    "PORTFOLIO_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "portfolio.db"),
+)
+STARTING_CASH = float(os.getenv("PORTFOLIO_STARTING_CASH", "100000"))
+SEED_HOLDINGS = {"AAPL": 50, "MSFT": 20, "NVDA": 10, "JPM": 30, "WMT": 25}
+
+LEDGER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS account (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    cash REAL NOT NULL,
+    total_cost_basis REAL NOT NULL,
+    realized_pnl REAL NOT NULL,
+    trade_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS positions (
+    symbol TEXT PRIMARY KEY,
+    sector TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    cost_basis REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sector_exposure (
+    sector TEXT PRIMARY KEY,
+    cost_basis REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    side TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    price REAL NOT NULL,
+    commission REAL NOT NULL,
+    executed_at TEXT NOT NULL
+);
+"""
+
+
+@dataclass
+class Position:
+    sector: str
+    quantity: int
+    cost_basis: float
+
+
+class PortfolioLedger:
+    """SQLite-backed trade ledger with running portfolio aggregates.
+
+    Each fill appends to ``trades`` and updates the position, account and
+    sector rows in the same WAL transaction. The aggregates are mirrored in
+    memory, so portfolio reads never touch the trade history. Shares promised
+    to open sell orders are held in ``reserved`` until the order fills or is
+    cancelled, so no two sells can count on the same shares. Resting buys
+    likewise hold ``reserved_cash`` for their limit or stop price plus
+    commission, and every fill is checked against the cash actually free.
+    """
+
+    def __init__(self, path: str, starting_cash: float = STARTING_CASH):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(LEDGER_SCHEMA)
+        with self._db:
+            self._db.execute(
+                "INSERT OR IGNORE INTO account VALUES (1, ?, 0, 0, 0)",
+                (starting_cash,),
+            )
+        (
+            self.cash,
+            self.total_cost_basis,
+            self.realized_pnl,
+            self.trade_count,
+        ) = self._db.execute(
+            "SELECT cash, total_cost_basis, realized_pnl, trade_count FROM account"
+        ).fetchone()
+        self.positions = {
+            symbol: Position(sector, quantity, cost_basis)
+            for symbol, sector, quantity, cost_basis in self._db.execute(
+                "SELECT symbol, sector, quantity, cost_basis FROM positions"
+            )
+        }
+        self.sector_exposure = dict(
+            self._db.execute("SELECT sector, cost_basis FROM sector_exposure")
+        )
+        self.reserved: dict[str, int] = {}
+        self.reserved_cash = 0.0
+
+    def reserve(self, symbol: str, quantity: int) -> str | None:
+        """Set aside shares for a sell order, or return why they are not free."""
+        with self._lock:
+            position = self.positions.get(symbol)
+            held = position.quantity if position else 0
+            reserved = self.reserved.get(symbol, 0)
+            if held - reserved < quantity:
+                return (
+                    f"Insufficient shares: holding {held}, "
+                    f"{reserved} reserved by open sell orders"
+                )
+            self.reserved[symbol] = reserved + quantity
+            return None
+
+    def check_cash(self, price: float, quantity: int) -> str | None:
+        """Why a buy at ``price`` cannot be paid for now, if it cannot."""
+        with self._lock:
+            return self._cash_shortfall(buy_cost(price, quantity))
+
+    def reserve_cash(self, price: float, quantity: int) -> str | None:
+        """Set aside cash for a resting buy, or return why it is not free."""
+        cost = buy_cost(price, quantity)
+        with self._lock:
+            reason = self._cash_shortfall(cost)
+            if reason is None:
+                self.reserved_cash = round(self.reserved_cash + cost, 2)
+            return reason
+
+    def _cash_shortfall(self, cost: float) -> str | None:
+        if self.cash - self.reserved_cash < cost:
+            return (
+                f"Insufficient cash: {cost:.2f} needed, {self.cash:.2f} held, "
+                f"{self.reserved_cash:.2f} reserved by open buy orders"
+            )
+        return None
+
+    @staticmethod
+    def resting_buy_cost(order: Order) -> float:
+        """Cash held for a resting buy: its limit or stop price plus commission."""
+        price = order.limit_price if order.order_type == "limit" else order.stop_price
+        return buy_cost(price, order.quantity)
+
+    def release(self, order: Order) -> None:
+        """Return an order's reserved shares or cash once it is settled."""
+        if order.side == "buy":
+            if order.order_type != "market":
+                with self._lock:
+                    held = self.reserved_cash - self.resting_buy_cost(order)
+                    self.reserved_cash = max(round(held, 2), 0.0)
+            return
+        with self._lock:
+            remaining = self.reserved.get(order.symbol, 0) - order.quantity
+            if remaining > 0:
+                self.reserved[order.symbol] = remaining
+            else:
+                self.reserved.pop(order.symbol, None)
+
+    def check_fill(self, order: Order, price: float) -> str | None:
+        """Why ``order`` cannot fill at ``price`` from current holdings."""
+        if order.side == "buy":
+            cost = buy_cost(price, order.quantity)
+            with self._lock:
+                free = self.cash - self.reserved_cash
+                if order.order_type != "market":
+                    # The order's own hold is part of what it may spend.
+                    free += self.resting_buy_cost(order)
+            if free < cost:
+                return (
+                    f"Cash no longer covers the order: {cost:.2f} needed, "
+                    f"{free:.2f} free"
+                )
+            return None
+        with self._lock:
+            position = self.positions.get(order.symbol)
+            held = position.quantity if position else 0
+        if held < order.quantity:
+            return f"Position no longer covers the order: holding {held}"
+        return None
+
+    def last_order_number(self) -> int:
+        """Highest ``ORD-`` order number in the trade history, or 0."""
+        with self._lock:
+            (last,) = self._db.execute(
+                "SELECT MAX(CAST(substr(order_id, 5) AS INTEGER)) FROM trades "
+                "WHERE order_id GLOB 'ORD-[0-9]*'"
+            ).fetchone()
+        return last or 0
+
+    def record_fill(self, order: Order) -> None:
+        """Apply an executed order to positions, cash and aggregates."""
+        self.record_trade(
+            order.order_id,
+            order.symbol,
+            order.side,
+            order.quantity,
+            order.fill_price,
+            order.commission,
+            order.updated_at,
+        )
+        self.release(order)
+
+    def record_trade(
+        self,
+        order_id: str,
+        symbol: str,
+        side: str,
+        quantity: int,
+        price: float,
+        commission: float,
+        executed_at: datetime,
+    ) -> None:
+        with self._lock:
+            sector = symbol_sector(symbol)
+            position = self.positions.get(symbol) or Position(sector, 0, 0.0)
+            if side == "buy":
+                cost_change = price * quantity + commission
+                self.cash -= cost_change
+            else:
+                if quantity > position.quantity:
+                    raise ValueError(
+                        f"Cannot sell {quantity} {symbol}: holding {position.quantity}"
+                    )
+                cost_change = -position.cost_basis * quantity / position.quantity
+                proceeds = price * quantity - commission
+                self.cash += proceeds
+                self.realized_pnl += proceeds + cost_change
+            position.quantity += quantity if side == "buy" else -quantity
+            position.cost_basis += cost_change
+            self.total_cost_basis += cost_change
+            self.trade_count += 1
+            exposure = self.sector_exposure.get(position.sector, 0.0) + cost_change
+            self.sector_exposure[position.sector] = exposure
+
+            with self._db:
+                self._db.execute(
+                    "INSERT INTO trades (order_id, symbol, side, quantity, price, "
+                    "commission, executed_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        order_id,
+                        symbol,
+                        side,
+                        quantity,
+                        price,
+                        commission,
+                        executed_at.isoformat(),
+                    ),
+                )
+                if position.quantity:
+                    self.positions[symbol] = position
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO positions VALUES (?, ?, ?, ?)",
+                        (
+                            symbol,
+                            position.sector,
+                            position.quantity,
+                            position.cost_basis,
+                        ),
+                    )
+                else:
+                    self.positions.pop(symbol, None)
+                    self._db.execute(
+                        "DELETE FROM positions WHERE symbol = ?", (symbol,)
+                    )
+                self._db.execute(
+                    "INSERT OR REPLACE INTO sector_exposure VALUES (?, ?)",
+                    (position.sector, exposure),
+                )
+                self._db.execute(
+                    "UPDATE account SET cash = ?, total_cost_basis = ?, "
+                    "realized_pnl = ?, trade_count = ? WHERE id = 1",
+                    (
+                        self.cash,
+                        self.total_cost_basis,
+                        self.realized_pnl,
+                        self.trade_count,
+                    ),
+                )
+
+    def seed(self, holdings: dict[str, int]) -> None:
+        """Open the demo holdings at base prices when the ledger is empty."""
+        if self.trade_count:
+            return
+        now = datetime.now(timezone.utc)
+        for symbol, quantity in holdings.items():
+            price = STOCK_DATA[symbol]["base_price"]
+            self.record_trade(
+                f"SEED-{symbol}", symbol, "buy", quantity, price, 0.0, now
+            )
+
+
+LEDGER = PortfolioLedger(PORTFOLIO_DB)
+LEDGER.seed(SEED_HOLDINGS)
+ORDER_BOOK.add_fill_listener(LEDGER.record_fill)
+ORDER_BOOK.add_cancel_listener(LEDGER.release)
+ORDER_BOOK.set_fill_check(LEDGER.check_fill)
+ORDER_BOOK.resume_ids(LEDGER.last_order_number())
+# Positions can outlive a change of universe; keep them priced.
+TICK_STORE.register_many({s: fallback_base_price(s) for s in LEDGER.positions})
+
+
+def place_order(
+    symbol: str,
+    side: Literal["buy", "sell"],
+    quantity: int,
+    order_type: str,
+    limit_price: float | None,
+    stop_price: float | None,
+) -> dict:
+    """Validate and submit an order, shaping the buy/sell tool response."""
+    symbol = normalize_symbol(symbol)
+    if symbol not in TICK_STORE:
+        return symbol_not_found(symbol)
+    if order_type not in ("market", "limit", "stop"):
+        return {
+            "status": "rejected",
+            "symbol": symbol,
+            "reason": f"Unknown order type '{order_type}'",
+        }
+    if quantity <= 0:
+        return {
+            "status": "rejected",
+            "symbol": symbol,
+            "reason": "Quantity must be positive",
+        }
+    if order_type == "limit" and limit_price is None:
+        return {
+            "status": "rejected",
+            "symbol": symbol,
+            "reason": "Limit orders require limit_price",
+        }
+    if order_type == "stop" and stop_price is None:
+        return {
+            "status": "rejected",
+            "symbol": symbol,
+            "reason": "Stop orders require stop_price",
+        }
+    for name, price in (("limit_price", limit_price), ("stop_price", stop_price)):
+        if price is not None and not (math.isfinite(price) and price > 0):
+            return {
+                "status": "rejected",
+                "symbol": symbol,
+                "reason": f"{name} must be a positive number",
+            }
+    # Sells reserve their shares and resting buys their cash until they
+    # settle; fills are checked again, as a stop can fill past its price.
+    if side == "sell":
+        reason = LEDGER.reserve(symbol, quantity)
+    elif order_type == "market":
+        reason = LEDGER.check_cash(get_mock_price(symbol), quantity)
+    else:
+        price = limit_price if order_type == "limit" else stop_price
+        reason = LEDGER.reserve_cash(price, quantity)
+    if reason is not None:
+        return {"status": "rejected", "symbol": symbol, "reason": reason}
+
+    order = ORDER_BOOK.submit(
+        symbol, side, order_type, quantity, limit_price, stop_price
+    )
+    result = {
+        "status": order.status,
+        "order_id": order.order_id,
+        "symbol": symbol,
+        "order_type": order_type,
+        "quantity": quantity,
+    }
+    if order.limit_price is not None:
+        result["limit_price"] = order.limit_price
+    if order.stop_price is not None:
+        result["stop_price"] = order.stop_price
+    if order.reason is not None:
+        result["reason"] = order.reason
+    if order.status != "executed":
+        result["created_at"] = order.created_at.isoformat()
+        return result
+
+    gross = order.fill_price * quantity
+    result["price_per_share"] = order.fill_price
+    if side == "buy":
+        result["total_cost"] = round(gross + order.commission, 2)
+    else:
+        result["total_proceeds"] = round(gross - order.commission, 2)
+    result["commission"] = order.commission
+    result["executed_at"] = order.updated_at.isoformat()
+    return result
+
+
+# Price streaming
+MIN_STREAM_INTERVAL = 0.25
+MAX_STREAM_INTERVAL = 60.0
+
+
+@dataclass(eq=False)
+class Subscription:
+    symbols: tuple[str, ...]
+    indices: np.ndarray
+    queue: asyncio.Queue
+
+
+class PriceBroadcaster:
+    """Fan tick snapshots out to streaming subscribers.
+
+    Subscribers sharing a cadence share one pump task, which reads a single
+    snapshot per beat and builds each distinct symbol set's update once.
+    Queues hold only the latest update, so slow consumers skip stale
+    prices instead of buffering them.
+    """
+
+    def __init__(self, store: PriceTickStore):
+        self._store = store
+        self._groups: dict[float, set[Subscription]] = {}
+        self._pumps: dict[float, asyncio.Task] = {}
+
+    @contextlib.asynccontextmanager
+    async def subscribe(
+        self, symbols: list[str], interval: float
+    ) -> AsyncIterator[asyncio.Queue]:
+        interval = min(max(interval, MIN_STREAM_INTERVAL), MAX_STREAM_INTERVAL)
+        sub = Subscription(tuple(symbols), symbol_indices(symbols), asyncio.Queue(1))
+        self._groups.setdefault(interval, set()).add(sub)
+        if interval not in self._pumps:
+            self._pumps[interval] = asyncio.create_task(self._pump(interval))
+        try:
+            yield sub.queue
+        finally:
+            group = self._groups[interval]
+            group.discard(sub)
+            if not group:
+                del self._groups[interval]
+                self._pumps.pop(interval).cancel()
+
+    async def _pump(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval - time.monotonic() % interval)
+            snap = self._store.snapshot()
+            updates: dict[tuple[str, ...], dict] = {}
+            for sub in list(self._groups.get(interval, ())):
+                update = updates.get(sub.symbols)
+                if update is None:
+                    update = updates[sub.symbols] = price_update(sub, snap)
+                if sub.queue.full():
+                    sub.queue.get_nowait()
+                sub.queue.put_nowait(update)
+
+
+def price_update(sub: Subscription, snap: TickSnapshot) -> dict:
+    prices = snap.prices[sub.indices]
+    previous = snap.previous_close[sub.indices]
+    change_pct = np.round((prices - previous) / previous * 100, 2).tolist()
+    return {
+        "tick": snap.tick,
+        "timestamp": snap.timestamp.isoformat(),
+        "prices": dict(zip(sub.symbols, np.round(prices, 2).tolist())),
+        "change_percent": dict(zip(sub.symbols, change_pct)),
+    }
+
+
+BROADCASTER = PriceBroadcaster(TICK_STORE)
+
+
+# Watchlists
+@dataclass
+class WatchEntry:
+    notes: str
+    added_at: datetime
+
+
+class WatchlistStore:
+    """Named watchlists kept as insertion-ordered sets of symbols."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lists: dict[str, dict[str, WatchEntry]] = {}
+
+    def add(self, name: str, symbol: str, notes: str) -> tuple[WatchEntry, bool]:
+        """Watch ``symbol``, returning its entry and whether it was new."""
+        with self._lock:
+            watchlist = self._lists.setdefault(name, {})
+            entry = watchlist.get(symbol)
+            if entry is not None:
+                entry.notes = notes or entry.notes
+                return entry, False
+            entry = watchlist[symbol] = WatchEntry(notes, datetime.now(timezone.utc))
+            return entry, True
+
+    def remove(self, name: str, symbol: str) -> bool:
+        with self._lock:
+            watchlist = self._lists.get(name, {})
+            removed = watchlist.pop(symbol, None) is not None
+            if not watchlist:
+                self._lists.pop(name, None)
+            return removed
+
+    def entries(self, name: str) -> list[tuple[str, WatchEntry]]:
+        with self._lock:
+            return list(self._lists.get(name, {}).items())
+
+
+WATCHLISTS = WatchlistStore()
+DEFAULT_WATCHLIST = "default"
+WATCHLIST_NAME_MAX_LENGTH = 64
+# Named by the caller rather than the transport: stateless HTTP and in-memory
+# clients get a fresh MCP session id on every request.
+WatchlistName = Annotated[
+    str,
+    Field(
+        description="Watchlist to use; clients share the default list unless "
+        "they pick their own name",
+        min_length=1,
+        max_length=WATCHLIST_NAME_MAX_LENGTH,
+    ),
+]
+
+
+def watchlist_id(name: str) -> str:
+    return f"WL-{zlib.crc32(name.encode('utf-8')) % 10000:04d}"
 
 
 @mcp.tool(name="buy_stock", description="Buy shares of a stock.")
@@ -72,25 +1488,17 @@ def buy_stock(
     order_type: Annotated[
         str, Field(description="Order type: market, limit, stop")
     ] = "market",
+    limit_price: Annotated[
+        float | None, Field(description="Maximum price per share for limit orders")
+    ] = None,
+    stop_price: Annotated[
+        float | None, Field(description="Trigger price for stop orders")
+    ] = None,
 ) -> dict:
     print(
         f"[green]invoking tool:buy_stock symbol={symbol}, quantity={quantity}[/green]"
     )
-    price = get_mock_price(symbol)
-    total_cost = price * quantity
-    commission = round(total_cost * 0.001, 2)  # 0.1% commission
-
-    return {
-        "status": "executed",
-        "order_id": f"ORD-{random.randint(100000, 999999)}",
-        "symbol": symbol,
-        "order_type": order_type,
-        "quantity": quantity,
-        "price_per_share": price,
-        "total_cost": round(total_cost + commission, 2),
-        "commission": commission,
-        "executed_at": datetime.now(timezone.utc).isoformat(),
-    }
+    return place_order(symbol, "buy", quantity, order_type, limit_price, stop_price)
 
 
 @mcp.tool(name="sell_stock", description="Sell shares of a stock.")
@@ -100,22 +1508,131 @@ def sell_stock(
     order_type: Annotated[
         str, Field(description="Order type: market, limit, stop")
     ] = "market",
+    limit_price: Annotated[
+        float | None, Field(description="Minimum price per share for limit orders")
+    ] = None,
+    stop_price: Annotated[
+        float | None, Field(description="Trigger price for stop orders")
+    ] = None,
 ) -> dict:
     print(f"[red]invoking tool:sell_stock symbol={symbol}, quantity={quantity}[/red]")
-    price = get_mock_price(symbol)
-    total_proceeds = price * quantity
-    commission = round(total_proceeds * 0.001, 2)  # 0.1% commission
+    return place_order(symbol, "sell", quantity, order_type, limit_price, stop_price)
+
+
+MAX_BATCH_SYMBOLS = 100
+
+
+def build_quotes(symbols: list[str]) -> tuple[list[dict], TickSnapshot]:
+    """Build quotes for ``symbols`` from one snapshot in a single vectorized pass."""
+    idx = symbol_indices(symbols)
+    snap = TICK_STORE.snapshot()
+    price = snap.prices[idx]
+    prev_close = snap.previous_close[idx]
+    change = price - prev_close
+    columns = zip(
+        symbols,
+        np.round(price, 2).tolist(),
+        np.round(prev_close, 2).tolist(),
+        np.round(change, 2).tolist(),
+        np.round(change / prev_close * 100, 2).tolist(),
+        np.round(snap.day_high[idx], 2).tolist(),
+        np.round(snap.day_low[idx], 2).tolist(),
+        snap.volume[idx].tolist(),
+    )
+    quotes = [
+        {
+            "symbol": symbol,
+            "price": p,
+            "currency": "USD",
+            "previous_close": pc,
+            "change": ch,
+            "change_percent": pct,
+            "day_high": hi,
+            "day_low": lo,
+            "volume": vol,
+        }
+        for symbol, p, pc, ch, pct, hi, lo, vol in columns
+    ]
+    return quotes, snap
+
+
+# Fundamentals
+FUNDAMENTALS_REFRESH_SECONDS = int(os.getenv("FUNDAMENTALS_REFRESH_SECONDS", "86400"))
+TRADING_DAYS_PER_YEAR = 252
+
+
+class FundamentalsStore:
+    """Per-symbol fundamentals generated once per refresh period.
+
+    Values are seeded from the symbol and the refresh epoch, so every
+    process serves identical numbers until the next scheduled refresh, and
+    repeated lookups are a dictionary hit.
+    """
+
+    def __init__(self, refresh_seconds: int = FUNDAMENTALS_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._epoch = -1
+        self._data: dict[str, dict] = {}
+
+    def get(self, symbol: str) -> dict:
+        epoch = int(time.time() // self.refresh_seconds)
+        if epoch != self._epoch:
+            with self._lock:
+                if epoch != self._epoch:
+                    self._data = {}
+                    self._epoch = epoch
+        data = self._data.get(symbol)
+        if data is None:
+            data = self._data[symbol] = self._generate(symbol, epoch)
+        return data
+
+    def _generate(self, symbol: str, epoch: int) -> dict:
+        rng = np.random.default_rng((symbol_seed(symbol), epoch))
+        price = previous_close(symbol)
+        year = generate_ohlcv(symbol, TRADING_DAYS_PER_YEAR, price)
+        pe_ratio, dividend_yield, beta, shares_outstanding = rng.uniform(
+            (15, 0, 0.8, 0.5e9), (35, 3.5, 1.5, 16e9)
+        ).tolist()
+        as_of = datetime.fromtimestamp(epoch * self.refresh_seconds, timezone.utc)
+        return {
+            "company_name": STOCK_DATA.get(symbol, {}).get(
+                "name", f"{symbol} Corporation"
+            ),
+            "sector": symbol_sector(symbol),
+            "market_cap": f"${price * shares_outstanding / 1e9:,.0f}B",
+            "pe_ratio": round(pe_ratio, 2),
+            "dividend_yield": round(dividend_yield, 2),
+            "52_week_high": float(year["high"].max()),
+            "52_week_low": float(year["low"].min()),
+            "avg_volume": int(year["volume"].mean()),
+            "eps": round(price / pe_ratio, 2),
+            "beta": round(beta, 2),
+            "fundamentals_as_of": as_of.isoformat(),
+        }
+
+
+FUNDAMENTALS = FundamentalsStore()
+
+
+def build_stock_info(symbol: str, price: float) -> dict:
+    """Describe a stock's company profile and fundamentals at ``price``."""
+    data = FUNDAMENTALS.get(symbol)
 
     return {
-        "status": "executed",
-        "order_id": f"ORD-{random.randint(100000, 999999)}",
         "symbol": symbol,
-        "order_type": order_type,
-        "quantity": quantity,
-        "price_per_share": price,
-        "total_proceeds": round(total_proceeds - commission, 2),
-        "commission": commission,
-        "executed_at": datetime.now(timezone.utc).isoformat(),
+        "company_name": data["company_name"],
+        "sector": data["sector"],
+        "current_price": price,
+        "market_cap": data["market_cap"],
+        "pe_ratio": data["pe_ratio"],
+        "dividend_yield": data["dividend_yield"],
+        "52_week_high": round(max(data["52_week_high"], price), 2),
+        "52_week_low": round(min(data["52_week_low"], price), 2),
+        "avg_volume": data["avg_volume"],
+        "eps": data["eps"],
+        "beta": data["beta"],
+        "fundamentals_as_of": data["fundamentals_as_of"],
     }
 
 
@@ -124,54 +1641,180 @@ def get_stock_price(
     symbol: Annotated[str, Field(description="Stock ticker symbol (e.g., AAPL, MSFT)")],
 ) -> dict:
     print(f"[cyan]invoking tool:get_stock_price symbol={symbol}[/cyan]")
-    price = get_mock_price(symbol)
-    prev_close = price * random.uniform(0.97, 1.03)
-    change = price - prev_close
-    change_pct = (change / prev_close) * 100
+
+    symbol = normalize_symbol(symbol)
+    if symbol not in TICK_STORE:
+        return symbol_not_found(symbol)
+    quotes, snap = build_quotes([symbol])
 
     return {
-        "symbol": symbol,
-        "price": price,
-        "currency": "USD",
-        "previous_close": round(prev_close, 2),
-        "change": round(change, 2),
-        "change_percent": round(change_pct, 2),
-        "day_high": round(price * 1.02, 2),
-        "day_low": round(price * 0.98, 2),
-        "volume": random.randint(10000000, 100000000),
-        "timestamp": datetime.now(timezone.utc).isoformat(),
+        **quotes[0],
+        "tick": snap.tick,
+        "timestamp": snap.timestamp.isoformat(),
+    }
+
+
+@mcp.tool(
+    name="get_stock_prices",
+    description="Get current prices for several stocks in one call.",
+)
+def get_stock_prices(
+    symbols: Annotated[
+        list[str],
+        Field(
+            description="Stock ticker symbols (e.g., ['AAPL', 'MSFT'])",
+            min_length=1,
+            max_length=MAX_BATCH_SYMBOLS,
+        ),
+    ],
+) -> dict:
+    print(f"[cyan]invoking tool:get_stock_prices symbols={symbols}[/cyan]")
+
+    symbols, unknown = resolve_symbols(symbols)
+    if unknown:
+        return symbols_not_found(unknown)
+    quotes, snap = build_quotes(symbols)
+
+    return {
+        "quotes": quotes,
+        "total": len(quotes),
+        "tick": snap.tick,
+        "timestamp": snap.timestamp.isoformat(),
+    }
+
+
+@mcp.tool(
+    name="stream_prices",
+    description=(
+        "Stream price updates for several stocks as log notifications at a "
+        "fixed interval, instead of polling get_stock_price."
+    ),
+)
+async def stream_prices(
+    symbols: Annotated[
+        list[str],
+        Field(
+            description="Stock ticker symbols to stream (e.g., ['AAPL', 'MSFT'])",
+            min_length=1,
+            max_length=MAX_BATCH_SYMBOLS,
+        ),
+    ],
+    ctx: Context,
+    interval_seconds: Annotated[
+        float,
+        Field(
+            description="Seconds between updates",
+            ge=MIN_STREAM_INTERVAL,
+            le=MAX_STREAM_INTERVAL,
+        ),
+    ] = 1.0,
+    duration_seconds: Annotated[
+        float, Field(description="How long to stream for", gt=0, le=3600)
+    ] = 30.0,
+) -> dict:
+    print(f"[cyan]invoking tool:stream_prices symbols={symbols}[/cyan]")
+
+    symbols, unknown = resolve_symbols(symbols)
+    if unknown:
+        return symbols_not_found(unknown)
+    updates_sent = 0
+    deadline = time.monotonic() + duration_seconds
+    async with BROADCASTER.subscribe(symbols, interval_seconds) as updates:
+        while (remaining := deadline - time.monotonic()) > 0:
+            try:
+                update = await asyncio.wait_for(updates.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            await ctx.info(json.dumps(update), logger_name="prices", extra=update)
+            updates_sent += 1
+
+    return {
+        "symbols": symbols,
+        "interval_seconds": interval_seconds,
+        "updates_sent": updates_sent,
     }
 
 
+@mcp.custom_route("/prices/stream", methods=["GET"])
+async def stream_prices_sse(request: Request) -> Response:
+    """Server-sent events feed: ``/prices/stream?symbols=AAPL,MSFT&interval=1``."""
+    symbols = [
+        s for s in request.query_params.get("symbols", "").split(",") if s.strip()
+    ]
+    if not symbols or len(symbols) > MAX_BATCH_SYMBOLS:
+        return JSONResponse(
+            {"error": f"Provide 1-{MAX_BATCH_SYMBOLS} comma-separated symbols"},
+            status_code=400,
+        )
+    try:
+        interval = float(request.query_params.get("interval", "1.0"))
+    except ValueError:
+        return JSONResponse({"error": "interval must be a number"}, status_code=400)
+    # Same bounds as the stream_prices tool; NaN would stall the pump's sleep.
+    if not (
+        math.isfinite(interval)
+        and MIN_STREAM_INTERVAL <= interval <= MAX_STREAM_INTERVAL
+    ):
+        return JSONResponse(
+            {
+                "error": f"interval must be between {MIN_STREAM_INTERVAL} "
+                f"and {MAX_STREAM_INTERVAL} seconds"
+            },
+            status_code=400,
+        )
+    symbols, unknown = resolve_symbols(symbols)
+    if unknown:
+        return JSONResponse(
+            {"error": "Unknown ticker symbols", "symbols": unknown}, status_code=404
+        )
+
+    async def events() -> AsyncIterator[str]:
+        async with BROADCASTER.subscribe(symbols, interval) as updates:
+            while not await request.is_disconnected():
+                yield f"data: {json.dumps(await updates.get())}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
 @mcp.tool(name="get_stock_info", description="Get detailed information about a stock.")
 def get_stock_info(
     symbol: Annotated[str, Field(description="Stock ticker symbol (e.g., AAPL, MSFT)")],
 ) -> dict:
     print(f"[blue]invoking tool:get_stock_info symbol={symbol}[/blue]")
 
-    if symbol in STOCK_DATA:
-        stock_data = STOCK_DATA[symbol]
-        name = stock_data["name"]
-        sector = stock_data["sector"]
-    else:
-        name = f"{symbol} Corporation"
-        sector = random.choice(["Technology", "Financial", "Healthcare", "Energy"])
+    symbol = normalize_symbol(symbol)
+    if symbol not in TICK_STORE:
+        return symbol_not_found(symbol)
+
+    return build_stock_info(symbol, get_mock_price(symbol))
+
 
-    price = get_mock_price(symbol)
+@mcp.tool(
+    name="get_stock_infos",
+    description="Get detailed information about several stocks in one call.",
+)
+def get_stock_infos(
+    symbols: Annotated[
+        list[str],
+        Field(
+            description="Stock ticker symbols (e.g., ['AAPL', 'MSFT'])",
+            min_length=1,
+            max_length=MAX_BATCH_SYMBOLS,
+        ),
+    ],
+) -> dict:
+    print(f"[blue]invoking tool:get_stock_infos symbols={symbols}[/blue]")
+
+    symbols, unknown = resolve_symbols(symbols)
+    if unknown:
+        return symbols_not_found(unknown)
+    idx = symbol_indices(symbols)
+    prices = np.round(TICK_STORE.snapshot().prices[idx], 2).tolist()
+    stocks = [build_stock_info(symbol, price) for symbol, price in zip(symbols, prices)]
 
     return {
-        "symbol": symbol,
-        "company_name": name,
-        "sector": sector,
-        "current_price": price,
-        "market_cap": f"${random.randint(100, 3000)}B",
-        "pe_ratio": round(random.uniform(15, 35), 2),
-        "dividend_yield": round(random.uniform(0, 3.5), 2),
-        "52_week_high": round(price * random.uniform(1.1, 1.3), 2),
-        "52_week_low": round(price * random.uniform(0.7, 0.9), 2),
-        "avg_volume": random.randint(5000000, 50000000),
-        "eps": round(random.uniform(5, 25), 2),
-        "beta": round(random.uniform(0.8, 1.5), 2),
+        "stocks": stocks,
+        "total": len(stocks),
     }
 
 
@@ -179,37 +1822,44 @@ def get_stock_info(
 def list_portfolio() -> dict:
     print("[magenta]invoking tool:list_portfolio[/magenta]")
 
-    portfolio_stocks = random.sample(list(STOCK_DATA.keys()), k=5)
-    holdings = []
-    total_value = 0
-
-    for symbol in portfolio_stocks:
-        quantity = random.randint(5, 100)
-        current_price = get_mock_price(symbol)
-        purchase_price = current_price * random.uniform(0.85, 1.15)
-        current_value = quantity * current_price
-        cost_basis = quantity * purchase_price
-        gain_loss = current_value - cost_basis
-        gain_loss_pct = (gain_loss / cost_basis) * 100
-
-        holdings.append(
-            {
-                "symbol": symbol,
-                "company_name": STOCK_DATA[symbol]["name"],
-                "quantity": quantity,
-                "purchase_price": round(purchase_price, 2),
-                "current_price": current_price,
-                "current_value": round(current_value, 2),
-                "cost_basis": round(cost_basis, 2),
-                "gain_loss": round(gain_loss, 2),
-                "gain_loss_percent": round(gain_loss_pct, 2),
-            }
+    positions = dict(LEDGER.positions)
+    symbols = list(positions)
+    prices = current_prices(symbols)
+    quantity = np.array([p.quantity for p in positions.values()], dtype=float)
+    cost_basis = np.array([p.cost_basis for p in positions.values()])
+    current_value = quantity * prices
+    gain_loss = current_value - cost_basis
+    holdings = [
+        {
+            "symbol": symbol,
+            "company_name": STOCK_DATA.get(symbol, {}).get("name", symbol),
+            "quantity": int(qty),
+            "purchase_price": round(cost / qty, 2),
+            "current_price": round(price, 2),
+            "current_value": round(value, 2),
+            "cost_basis": round(cost, 2),
+            "gain_loss": round(gl, 2),
+            "gain_loss_percent": round(gl / cost * 100, 2),
+        }
+        for symbol, qty, price, value, cost, gl in zip(
+            symbols,
+            quantity.tolist(),
+            prices.tolist(),
+            current_value.tolist(),
+            cost_basis.tolist(),
+            gain_loss.tolist(),
         )
-        total_value += current_value
+    ]
 
     return {
         "holdings": holdings,
-        "total_value": round(total_value, 2),
+        "total_value": round(float(current_value.sum()), 2),
+        "total_cost_basis": round(LEDGER.total_cost_basis, 2),
+        "sector_exposure": {
+            sector: round(cost, 2)
+            for sector, cost in LEDGER.sector_exposure.items()
+            if round(cost, 2)
+        },
         "total_stocks": len(holdings),
         "currency": "USD",
         "as_of": datetime.now(timezone.utc).isoformat(),
@@ -223,17 +1873,342 @@ def list_portfolio() -> dict:
 def get_portfolio_value() -> dict:
     print("[yellow]invoking tool:get_portfolio_value[/yellow]")
 
-    total_value = random.uniform(50000, 500000)
-    cash_balance = random.uniform(5000, 50000)
-    total_assets = total_value + cash_balance
+    positions = dict(LEDGER.positions)
+    idx = symbol_indices(list(positions))
+    snap = TICK_STORE.snapshot()
+    quantity = np.array([p.quantity for p in positions.values()], dtype=float)
+    total_value = float(quantity @ snap.prices[idx])
+    previous_value = float(quantity @ snap.previous_close[idx])
+    daily_change = total_value - previous_value
+    cash_balance = LEDGER.cash
 
     return {
         "total_portfolio_value": round(total_value, 2),
         "cash_balance": round(cash_balance, 2),
-        "total_assets": round(total_assets, 2),
+        "total_assets": round(total_value + cash_balance, 2),
+        "total_cost_basis": round(LEDGER.total_cost_basis, 2),
+        "unrealized_gain_loss": round(total_value - LEDGER.total_cost_basis, 2),
+        "realized_gain_loss": round(LEDGER.realized_pnl, 2),
+        "currency": "USD",
+        "daily_change": round(daily_change, 2),
+        "daily_change_percent": round(
+            daily_change / previous_value * 100 if previous_value else 0.0, 2
+        ),
+        "as_of": snap.timestamp.isoformat(),
+    }
+
+
+# Portfolio risk
+RISK_LOOKBACK_DAYS = 252
+RISK_PATH_BATCH = 100_000
+
+
+@functools.lru_cache(maxsize=4096)
+def daily_log_returns(symbol: str, session: np.datetime64, days: int) -> np.ndarray:
+    """Daily log returns over the ``days`` completed sessions before ``session``."""
+    close = generate_ohlcv(symbol, days + 1, previous_close(symbol))["close"]
+    return np.diff(np.log(close))
+
+
+def return_matrix(symbols: list[str], days: int) -> np.ndarray:
+    """Stack each symbol's cached daily log returns into a (days, n) matrix."""
+    today = datetime.now(ZoneInfo(NYSE_CALENDAR.timezone)).date()
+    session = np.datetime64(today, "D")
+    return np.column_stack([daily_log_returns(s, session, days) for s in symbols])
+
+
+def covariance_factor(returns: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Mean vector and Cholesky factor of the return covariance.
+
+    A small diagonal jitter is added when the sample covariance is not
+    positive definite (e.g. more holdings than observations).
+    """
+    mean = returns.mean(axis=0)
+    cov = np.atleast_2d(np.cov(returns, rowvar=False))
+    jitter = 0.0
+    while True:
+        try:
+            return mean, np.linalg.cholesky(cov + jitter * np.eye(len(cov)))
+        except np.linalg.LinAlgError:
+            jitter = max(jitter * 10, 1e-10)
+
+
+def simulate_pnl(
+    values: np.ndarray,
+    mean: np.ndarray,
+    chol: np.ndarray,
+    horizon_days: int,
+    paths: int,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """Correlated Monte Carlo P&L over ``horizon_days`` for position ``values``.
+
+    Paths are drawn in fixed-size batches to bound peak memory; each batch
+    is one (batch, n) normal draw and one matrix multiply.
+    """
+    pnl = np.empty(paths)
+    drift = mean * horizon_days
+    scale = np.sqrt(horizon_days)
+    for start in range(0, paths, RISK_PATH_BATCH):
+        stop = min(start + RISK_PATH_BATCH, paths)
+        z = rng.standard_normal((stop - start, len(values)))
+        log_returns = drift + scale * (z @ chol.T)
+        pnl[start:stop] = np.expm1(log_returns) @ values
+    return pnl
+
+
+@mcp.tool(
+    name="get_portfolio_risk",
+    description=(
+        "Estimate portfolio Value at Risk and expected shortfall with a "
+        "correlated Monte Carlo simulation over the current holdings."
+    ),
+)
+def get_portfolio_risk(
+    confidence_levels: Annotated[
+        list[float],
+        Field(description="Confidence levels, e.g. [0.95, 0.99]", min_length=1),
+    ] = [0.95, 0.99],
+    horizon_days: Annotated[
+        int, Field(description="Risk horizon in trading days", ge=1, le=252)
+    ] = 1,
+    paths: Annotated[
+        int, Field(description="Number of simulated paths", ge=1000, le=1_000_000)
+    ] = 100_000,
+    lookback_days: Annotated[
+        int,
+        Field(description="Trading days of history for the covariance", ge=20, le=2520),
+    ] = RISK_LOOKBACK_DAYS,
+    seed: Annotated[
+        int | None, Field(description="Random seed for reproducible results")
+    ] = None,
+) -> dict:
+    print(f"[yellow]invoking tool:get_portfolio_risk paths={paths}[/yellow]")
+
+    positions = dict(LEDGER.positions)
+    symbols = list(positions)
+    if not symbols:
+        return {"status": "empty_portfolio", "holdings": 0}
+    if any(not 0 < c < 1 for c in confidence_levels):
+        return {"status": "rejected", "reason": "Confidence levels must be in (0, 1)"}
+
+    quantity = np.array([p.quantity for p in positions.values()], dtype=float)
+    values = quantity * current_prices(symbols)
+    total = float(values.sum())
+
+    mean, chol = covariance_factor(return_matrix(symbols, lookback_days))
+    rng = np.random.default_rng(seed)
+    pnl = simulate_pnl(values, mean, chol, horizon_days, paths, rng)
+
+    losses = -pnl
+    thresholds = np.quantile(losses, confidence_levels)
+    risk = []
+    for confidence, var in zip(confidence_levels, thresholds.tolist()):
+        es = float(losses[losses >= var].mean())
+        risk.append(
+            {
+                "confidence": confidence,
+                "value_at_risk": round(var, 2),
+                "expected_shortfall": round(es, 2),
+                "value_at_risk_percent": round(var / total * 100, 2),
+                "expected_shortfall_percent": round(es / total * 100, 2),
+            }
+        )
+
+    cov_values = chol @ chol.T
+    daily_vol = float(np.sqrt(values @ cov_values @ values)) / total
+
+    return {
+        "portfolio_value": round(total, 2),
+        "holdings": len(symbols),
+        "horizon_days": horizon_days,
+        "paths": paths,
+        "lookback_days": lookback_days,
+        "daily_volatility_percent": round(daily_vol * 100, 2),
+        "risk": risk,
+        "currency": "USD",
+        "as_of": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+# Rebalancing
+MAX_REBALANCE_ASSETS = 500
+REBALANCE_MAX_ITERATIONS = 500
+REBALANCE_TOLERANCE = 1e-9
+
+
+def project_capped_simplex(
+    y: np.ndarray, upper: np.ndarray, budget: float
+) -> np.ndarray:
+    """Euclidean projection onto ``{0 <= w <= upper, sum(w) <= budget}``.
+
+    ``sum(clip(y - shift, 0, upper))`` is piecewise linear in the budget
+    multiplier ``shift``, with knots at ``y - upper`` and ``y``; sorting the
+    knots and accumulating slopes finds the exact ``shift`` in O(n log n).
+    """
+    w = np.clip(y, 0.0, upper)
+    if w.sum() <= budget:
+        return w
+    knots = np.concatenate((y - upper, y))
+    order = np.argsort(knots)
+    knots = knots[order]
+    # Each asset's slope drops by one at y - upper and recovers at y.
+    slope = np.cumsum(np.repeat((-1, 1), len(y))[order])
+    totals = upper.sum() + np.concatenate(
+        ([0.0], np.cumsum(slope[:-1] * np.diff(knots)))
+    )
+    i = int(np.searchsorted(-totals, -budget))
+    shift = knots[i - 1] + (totals[i - 1] - budget) / -slope[i - 1]
+    return np.clip(y - shift, 0.0, upper)
+
+
+def mean_variance_weights(
+    mean: np.ndarray,
+    cov: np.ndarray,
+    risk_aversion: float,
+    upper: np.ndarray,
+    budget: float,
+    start: np.ndarray,
+) -> tuple[np.ndarray, int]:
+    """Maximize ``mean @ w - risk_aversion / 2 * w @ cov @ w`` over the capped simplex.
+
+    Accelerated projected gradient (FISTA) with a fixed 1/L step, where L is
+    the largest eigenvalue of the objective's Hessian. Returns the weights
+    and the number of iterations used.
+    """
+    lipschitz = risk_aversion * float(np.linalg.eigvalsh(cov)[-1])
+    step = 1.0 / max(lipschitz, 1e-12)
+    w = project_capped_simplex(start, upper, budget)
+    y, t = w, 1.0
+    for iteration in range(1, REBALANCE_MAX_ITERATIONS + 1):
+        grad = mean - risk_aversion * (cov @ y)
+        w_next = project_capped_simplex(y + step * grad, upper, budget)
+        t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        y = w_next + ((t - 1) / t_next) * (w_next - w)
+        converged = np.abs(w_next - w).max() < REBALANCE_TOLERANCE
+        w, t = w_next, t_next
+        if converged:
+            break
+    return w, iteration
+
+
+@mcp.tool(
+    name="suggest_rebalance",
+    description=(
+        "Suggest target weights and trades from a long-only mean-variance "
+        "optimization over the holdings and cash, with position limits and a "
+        "turnover cap."
+    ),
+)
+def suggest_rebalance(
+    symbols: Annotated[
+        list[str],
+        Field(
+            description="Extra symbols to consider besides current holdings",
+            max_length=MAX_REBALANCE_ASSETS,
+        ),
+    ] = [],
+    risk_aversion: Annotated[
+        float, Field(description="Penalty on portfolio variance", gt=0, le=1000)
+    ] = 5.0,
+    max_position_weight: Annotated[
+        float, Field(description="Largest weight for any one stock", gt=0, le=1)
+    ] = 0.25,
+    min_cash_weight: Annotated[
+        float, Field(description="Smallest weight to keep in cash", ge=0, lt=1)
+    ] = 0.02,
+    max_turnover: Annotated[
+        float,
+        Field(
+            description="Maximum sum of absolute weight changes across stocks",
+            gt=0,
+            le=2,
+        ),
+    ] = 0.5,
+    lookback_days: Annotated[
+        int,
+        Field(description="Trading days of history for the estimates", ge=20, le=2520),
+    ] = RISK_LOOKBACK_DAYS,
+) -> dict:
+    print(
+        f"[yellow]invoking tool:suggest_rebalance symbols={symbols} "
+        f"risk_aversion={risk_aversion}[/yellow]"
+    )
+
+    positions = dict(LEDGER.positions)
+    symbols, unknown = resolve_symbols(symbols)
+    if unknown:
+        return symbols_not_found(unknown)
+    candidates = list(dict.fromkeys([*positions, *symbols]))
+    if not candidates:
+        return {"status": "empty_portfolio", "holdings": 0}
+    if len(candidates) > MAX_REBALANCE_ASSETS:
+        return {
+            "status": "rejected",
+            "reason": f"At most {MAX_REBALANCE_ASSETS} assets can be optimized",
+        }
+
+    prices = current_prices(candidates)
+    quantity = np.array(
+        [positions[s].quantity if s in positions else 0 for s in candidates],
+        dtype=float,
+    )
+    values = quantity * prices
+    cash = LEDGER.cash
+    equity = float(values.sum()) + cash
+    current = values / equity
+
+    returns = return_matrix(candidates, lookback_days)
+    mean = returns.mean(axis=0) * TRADING_DAYS_PER_YEAR
+    cov = np.atleast_2d(np.cov(returns, rowvar=False)) * TRADING_DAYS_PER_YEAR
+    upper = np.full(len(candidates), max_position_weight)
+    budget = 1.0 - min_cash_weight
+    optimal, iterations = mean_variance_weights(
+        mean, cov, risk_aversion, upper, budget, current
+    )
+
+    # Trades forced by the limits come first; the rest of the move toward the
+    # optimum is scaled back along a straight line to respect the cap.
+    feasible = project_capped_simplex(current, upper, budget)
+    forced = float(np.abs(feasible - current).sum())
+    remaining = float(np.abs(optimal - feasible).sum())
+    fraction = 1.0
+    if remaining > 0 and forced + remaining > max_turnover:
+        fraction = max(max_turnover - forced, 0.0) / remaining
+    target = feasible + fraction * (optimal - feasible)
+
+    shares = np.trunc((target - current) * equity / prices)
+    trades = [
+        {
+            "symbol": symbol,
+            "side": "buy" if qty > 0 else "sell",
+            "quantity": int(abs(qty)),
+            "estimated_value": round(abs(qty) * price, 2),
+        }
+        for symbol, qty, price in zip(candidates, shares.tolist(), prices.tolist())
+        if qty
+    ]
+    targets = [
+        {
+            "symbol": symbol,
+            "current_weight": round(cur, 4),
+            "target_weight": round(tgt, 4),
+        }
+        for symbol, cur, tgt in zip(candidates, current.tolist(), target.tolist())
+    ]
+
+    return {
+        "equity": round(equity, 2),
+        "current_cash_weight": round(cash / equity, 4),
+        "target_cash_weight": round(1.0 - float(target.sum()), 4),
+        "expected_return_percent": round(float(mean @ target) * 100, 2),
+        "volatility_percent": round(float(np.sqrt(target @ cov @ target)) * 100, 2),
+        "turnover": round(float(np.abs(target - current).sum()), 4),
+        "turnover_capped": fraction < 1.0,
+        "iterations": iterations,
+        "targets": targets,
+        "trades": trades,
         "currency": "USD",
-        "daily_change": round(random.uniform(-5000, 5000), 2),
-        "daily_change_percent": round(random.uniform(-3, 3), 2),
         "as_of": datetime.now(timezone.utc).isoformat(),
     }
 
@@ -244,23 +2219,23 @@ def get_portfolio_value() -> dict:
 )
 def search_stocks(
     query: Annotated[str, Field(description="Search query for stock name or symbol")],
+    limit: Annotated[
+        int, Field(description="Maximum number of results", ge=1, le=100)
+    ] = 10,
 ) -> dict:
     print(f"[cyan]invoking tool:search_stocks query={query}[/cyan]")
 
-    # Filter stocks that match the query
-    results = []
-    query_lower = query.lower()
-
-    for symbol, data in STOCK_DATA.items():
-        if query_lower in symbol.lower() or query_lower in data["name"].lower():
-            results.append(
-                {
-                    "symbol": symbol,
-                    "name": data["name"],
-                    "sector": data["sector"],
-                    "current_price": get_mock_price(symbol),
-                }
-            )
+    symbols = SYMBOL_INDEX.search(query, limit)
+    prices = np.round(current_prices(symbols), 2)
+    results = [
+        {
+            "symbol": symbol,
+            "name": STOCK_DATA[symbol]["name"],
+            "sector": STOCK_DATA[symbol]["sector"],
+            "current_price": price,
+        }
+        for symbol, price in zip(symbols, prices.tolist())
+    ]
 
     return {
         "results": results,
@@ -269,45 +2244,772 @@ def search_stocks(
     }
 
 
+# Technical indicators
+INDICATORS = ("sma", "ema", "rsi", "vwap", "bollinger")
+INDICATOR_MIN_BARS = 252
+BOLLINGER_WIDTH = 2.0
+
+
+@dataclass(frozen=True)
+class IndicatorState:
+    """Indicator series over completed bars.
+
+    The ``tail_*``, ``ema`` and ``avg_*`` fields are the rolling state needed
+    to fold one more (live) bar in with O(1) work.
+    """
+
+    window: int
+    dates: np.ndarray
+    series: dict[str, np.ndarray]
+    last_close: float
+    tail_sum: float  # closes of the last ``window - 1`` bars
+    tail_sumsq: float
+    tail_pv: float  # typical price * volume of the last ``window - 1`` bars
+    tail_volume: float
+    ema: float
+    avg_gain: float
+    avg_loss: float
+
+
+def rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing ``window`` sums, NaN until the window is full."""
+    out = np.full(len(values), np.nan)
+    csum = np.concatenate(([0.0], np.cumsum(values)))
+    out[window - 1 :] = csum[window:] - csum[:-window]
+    return out
+
+
+def wilder_rsi(close: np.ndarray, window: int) -> tuple[np.ndarray, float, float]:
+    """RSI series with Wilder smoothing, plus the final average gain/loss."""
+    delta = np.diff(close)
+    gains, losses = np.maximum(delta, 0.0), np.maximum(-delta, 0.0)
+    avg_gain, avg_loss = gains[:window].mean(), losses[:window].mean()
+    rsi = np.full(len(close), np.nan)
+    # Wilder smoothing is recursive; this runs once per symbol per session.
+    for i in range(window, len(close)):
+        if i > window:
+            avg_gain = (avg_gain * (window - 1) + gains[i - 1]) / window
+            avg_loss = (avg_loss * (window - 1) + losses[i - 1]) / window
+        rsi[i] = rsi_value(avg_gain, avg_loss)
+    return rsi, avg_gain, avg_loss
+
+
+def rsi_value(avg_gain: float, avg_loss: float) -> float:
+    if avg_loss == 0:
+        return 100.0
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+def ema_series(close: np.ndarray, window: int) -> np.ndarray:
+    """EMA seeded with the first window's SMA."""
+    alpha = 2.0 / (window + 1)
+    ema = np.full(len(close), np.nan)
+    value = close[:window].mean()
+    ema[window - 1] = value
+    for i in range(window, len(close)):
+        value += alpha * (close[i] - value)
+        ema[i] = value
+    return ema
+
+
+@functools.lru_cache(maxsize=1024)
+def completed_indicators(
+    symbol: str, session: np.datetime64, last_close: float, window: int, bars: int
+) -> IndicatorState:
+    """Compute every indicator over the completed bars before ``session``.
+
+    Completed bars only change when a new session starts or the simulated
+    session closes at a new ``last_close``, so this is cached per (symbol,
+    session, last_close, window); live ticks are folded in by ``live_indicators``
+    without recomputing the series.
+    """
+    dates = history_dates(bars)
+    data = generate_ohlcv(symbol, len(dates), last_close)
+    close, volume = data["close"], data["volume"].astype(float)
+    typical = (data["high"] + data["low"] + close) / 3
+
+    sma = rolling_sum(close, window) / window
+    variance = rolling_sum(close**2, window) / window - sma**2
+    std = np.sqrt(np.maximum(variance, 0.0))
+    vwap = rolling_sum(typical * volume, window) / rolling_sum(volume, window)
+    ema = ema_series(close, window)
+    rsi, avg_gain, avg_loss = wilder_rsi(close, window)
+
+    tail = slice(len(close) - (window - 1), None)
+    return IndicatorState(
+        window=window,
+        dates=dates,
+        series={
+            "sma": sma,
+            "ema": ema,
+            "rsi": rsi,
+            "vwap": vwap,
+            "bollinger_upper": sma + BOLLINGER_WIDTH * std,
+            "bollinger_lower": sma - BOLLINGER_WIDTH * std,
+        },
+        last_close=float(close[-1]),
+        tail_sum=float(close[tail].sum()),
+        tail_sumsq=float((close[tail] ** 2).sum()),
+        tail_pv=float((typical[tail] * volume[tail]).sum()),
+        tail_volume=float(volume[tail].sum()),
+        ema=float(ema[-1]),
+        avg_gain=float(avg_gain),
+        avg_loss=float(avg_loss),
+    )
+
+
+def live_indicators(state: IndicatorState, price: float, volume: float) -> dict:
+    """Fold the live tick into the cached state as an in-progress bar."""
+    w = state.window
+    sma = (state.tail_sum + price) / w
+    std = np.sqrt(max((state.tail_sumsq + price**2) / w - sma**2, 0.0))
+    delta = price - state.last_close
+    avg_gain = (state.avg_gain * (w - 1) + max(delta, 0.0)) / w
+    avg_loss = (state.avg_loss * (w - 1) + max(-delta, 0.0)) / w
+    total_volume = state.tail_volume + volume
+    return {
+        "sma": sma,
+        "ema": state.ema + 2.0 / (w + 1) * (price - state.ema),
+        "rsi": rsi_value(avg_gain, avg_loss),
+        "vwap": (
+            (state.tail_pv + price * volume) / total_volume if total_volume else sma
+        ),
+        "bollinger_upper": sma + BOLLINGER_WIDTH * std,
+        "bollinger_lower": sma - BOLLINGER_WIDTH * std,
+    }
+
+
+def series_keys(indicators: list[str]) -> list[str]:
+    keys = []
+    for name in indicators:
+        if name == "bollinger":
+            keys += ["sma", "bollinger_upper", "bollinger_lower"]
+        else:
+            keys.append(name)
+    return list(dict.fromkeys(keys))
+
+
+def bucket_starts(keys: np.ndarray) -> np.ndarray:
+    """Indices where a sorted key array changes value (bucket boundaries)."""
+    return np.concatenate(([0], np.flatnonzero(keys[1:] != keys[:-1]) + 1))
+
+
+def resample_ohlcv(
+    dates: np.ndarray, bars: dict[str, np.ndarray], starts: np.ndarray
+) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """Aggregate consecutive bars into buckets beginning at ``starts``.
+
+    Each bucket keeps its first date and open, last close, highest high,
+    lowest low and summed volume.
+    """
+    ends = np.append(starts[1:], len(dates)) - 1
+    return dates[starts], {
+        "open": bars["open"][starts],
+        "high": np.maximum.reduceat(bars["high"], starts),
+        "low": np.minimum.reduceat(bars["low"], starts),
+        "close": bars["close"][ends],
+        "volume": np.add.reduceat(bars["volume"], starts),
+    }
+
+
+def downsample_ohlcv(
+    dates: np.ndarray, bars: dict[str, np.ndarray], interval: str, max_points: int
+) -> tuple[np.ndarray, dict[str, np.ndarray], int]:
+    """Resample daily bars to ``interval``, then merge to at most ``max_points``.
+
+    Also returns how many ``interval`` bars each output bar spans; only the
+    oldest bar can span fewer.
+    """
+    if interval == "week":
+        # Epoch day 0 was a Thursday; shift so weeks start on Monday.
+        keys = (dates.astype(np.int64) + 3) // 7
+        dates, bars = resample_ohlcv(dates, bars, bucket_starts(keys))
+    elif interval == "month":
+        keys = dates.astype("datetime64[M]")
+        dates, bars = resample_ohlcv(dates, bars, bucket_starts(keys))
+
+    n = len(dates)
+    step = -(-n // max_points)
+    if step > 1:
+        # Fixed-size buckets aligned so the most recent one is complete.
+        starts = np.arange(n % step, n, step)
+        if n % step:
+            starts = np.concatenate(([0], starts))
+        dates, bars = resample_ohlcv(dates, bars, starts)
+    return dates, bars, max(step, 1)
+
+
+@mcp.tool(
+    name="get_sector_summary",
+    description=(
+        "Get per-sector average move, breadth (advancers vs decliners) and "
+        "top movers."
+    ),
+)
+def get_sector_summary(
+    sector: Annotated[
+        str | None,
+        Field(description="Sector name (e.g., Technology); omit for all sectors"),
+    ] = None,
+) -> dict:
+    print(f"[yellow]invoking tool:get_sector_summary sector={sector}[/yellow]")
+
+    tick, summary = SECTOR_INDEX.summary()
+    if sector is not None:
+        matches = {k: v for k, v in summary.items() if k.lower() == sector.lower()}
+        if not matches:
+            return {
+                "status": "not_found",
+                "sector": sector,
+                "available_sectors": sorted(summary),
+            }
+        summary = matches
+
+    return {
+        "sectors": [{"sector": name, **data} for name, data in summary.items()],
+        "total": len(summary),
+        "tick": tick,
+    }
+
+
 @mcp.tool(
     name="get_stock_history",
     description="Get historical price data for a stock.",
 )
 def get_stock_history(
     symbol: Annotated[str, Field(description="Stock ticker symbol (e.g., AAPL, MSFT)")],
-    days: Annotated[int, Field(description="Number of days of history")] = 30,
+    days: Annotated[int, Field(description="Number of trading days of history")] = 30,
+    format: Annotated[
+        Literal["rows", "columns"],
+        Field(
+            description="Response shape: 'rows' (one dict per day) or 'columns' "
+            "(one list per field, compact for long histories)"
+        ),
+    ] = "rows",
+    interval: Annotated[
+        Literal["day", "week", "month"],
+        Field(description="Bar size: 'day', 'week' or 'month'"),
+    ] = "day",
+    max_points: Annotated[
+        int,
+        Field(
+            description="Maximum number of bars to return; longer histories "
+            "are merged into wider bars (see intervals_per_bar)",
+            ge=1,
+            le=5000,
+        ),
+    ] = 500,
 ) -> dict:
     print(f"[blue]invoking tool:get_stock_history symbol={symbol}, days={days}[/blue]")
 
-    current_price = get_mock_price(symbol)
-    history = []
+    symbol = normalize_symbol(symbol)
+    if symbol not in TICK_STORE:
+        return symbol_not_found(symbol)
+
+    dates = history_dates(max(days, 1))
+    days = len(dates)
+    bars = generate_ohlcv(symbol, days, previous_close(symbol))
+    dates, bars, intervals_per_bar = downsample_ohlcv(dates, bars, interval, max_points)
+    columns = {
+        "date": dates.astype(str).tolist(),
+        "open": np.round(bars["open"], 2).tolist(),
+        "high": np.round(bars["high"], 2).tolist(),
+        "low": np.round(bars["low"], 2).tolist(),
+        "close": np.round(bars["close"], 2).tolist(),
+        "volume": bars["volume"].tolist(),
+    }
 
-    for i in range(days, 0, -1):
-        date = (datetime.now(timezone.utc) - timedelta(days=i)).date().isoformat()
-        # Generate price with random walk
-        price = current_price * random.uniform(0.95, 1.05)
-        open_price = price * random.uniform(0.98, 1.02)
-        high = max(price, open_price) * random.uniform(1.0, 1.02)
-        low = min(price, open_price) * random.uniform(0.98, 1.0)
+    if format == "columns":
+        return {
+            "symbol": symbol,
+            "columns": columns,
+            "interval": interval,
+            "intervals_per_bar": intervals_per_bar,
+            "points": len(dates),
+            "period_days": days,
+        }
 
-        history.append(
-            {
-                "date": date,
-                "open": round(open_price, 2),
-                "high": round(high, 2),
-                "low": round(low, 2),
-                "close": round(price, 2),
-                "volume": random.randint(20000000, 80000000),
-            }
-        )
+    keys = tuple(columns)
+    history = [dict(zip(keys, row)) for row in zip(*columns.values())]
 
     return {
         "symbol": symbol,
         "history": history,
+        "interval": interval,
+        "intervals_per_bar": intervals_per_bar,
+        "points": len(dates),
         "period_days": days,
     }
 
 
+@mcp.tool(
+    name="get_indicators",
+    description=(
+        "Compute technical indicators (SMA, EMA, RSI, VWAP, Bollinger Bands) "
+        "for a stock over its daily history, including the live price."
+    ),
+)
+def get_indicators(
+    symbol: Annotated[str, Field(description="Stock ticker symbol (e.g., AAPL, MSFT)")],
+    indicators: Annotated[
+        list[Literal["sma", "ema", "rsi", "vwap", "bollinger"]],
+        Field(description="Indicators to compute", min_length=1),
+    ] = list(INDICATORS),
+    window: Annotated[
+        int, Field(description="Lookback window in trading days", ge=2, le=200)
+    ] = 20,
+    points: Annotated[
+        int,
+        Field(description="Number of recent daily values to return", ge=1, le=500),
+    ] = 30,
+) -> dict:
+    print(
+        f"[blue]invoking tool:get_indicators symbol={symbol}, indicators={indicators}[/blue]"
+    )
+
+    symbol = normalize_symbol(symbol)
+    if symbol not in TICK_STORE:
+        return symbol_not_found(symbol)
+
+    idx = TICK_STORE.index_of(symbol)
+    snap = TICK_STORE.snapshot()
+    today = datetime.now(ZoneInfo(NYSE_CALENDAR.timezone)).date()
+    bars = max(INDICATOR_MIN_BARS, points + 3 * window)
+    state = completed_indicators(
+        symbol,
+        np.datetime64(today, "D"),
+        float(snap.previous_close[idx]),
+        window,
+        bars,
+    )
+
+    keys = series_keys(indicators)
+    live = live_indicators(state, float(snap.prices[idx]), float(snap.volume[idx]))
+    recent = slice(-min(points, len(state.dates)), None)
+    series = {
+        key: [None if np.isnan(v) else v for v in np.round(values[recent], 2).tolist()]
+        for key, values in state.series.items()
+        if key in keys
+    }
+
+    return {
+        "symbol": symbol,
+        "window": window,
+        "dates": state.dates[recent].astype(str).tolist(),
+        "series": series,
+        "live": {
+            "price": round(float(snap.prices[idx]), 2),
+            "tick": snap.tick,
+            **{key: round(float(live[key]), 2) for key in keys},
+        },
+    }
+
+
+# Strategy backtests
+BACKTEST_STRATEGIES = ("ma_crossover", "threshold_rebalance")
+MAX_PARAMETER_SETS = 100
+
+
+def sma_matrix(close: np.ndarray, windows: np.ndarray) -> np.ndarray:
+    """Trailing SMAs for every window at once, shape (len(windows), len(close)).
+
+    Values before a window fills are NaN.
+    """
+    csum = np.concatenate(([0.0], np.cumsum(close)))
+    t = np.arange(len(close))
+    start = t[None, :] + 1 - windows[:, None]
+    valid = start >= 0
+    sums = csum[t + 1][None, :] - csum[np.where(valid, start, 0)]
+    return np.where(valid, sums / windows[:, None], np.nan)
+
+
+def equity_stats(equity: np.ndarray, capital: float) -> dict[str, np.ndarray]:
+    """P&L and max drawdown for each row of an equity curve matrix."""
+    peak = np.maximum.accumulate(equity, axis=1)
+    return {
+        "pnl": equity[:, -1] - capital,
+        "total_return_percent": (equity[:, -1] / capital - 1) * 100,
+        "max_drawdown_percent": (equity / peak - 1).min(axis=1) * 100,
+    }
+
+
+def backtest_ma_crossover(
+    close: np.ndarray, fast: np.ndarray, slow: np.ndarray, capital: float, cost: float
+) -> dict[str, np.ndarray]:
+    """Long when the fast SMA is above the slow SMA, flat otherwise.
+
+    Every parameter set is one row of the (sets, days) position matrix;
+    positions act on the next bar's return so there is no lookahead.
+    """
+    windows, inverse = np.unique(np.concatenate((fast, slow)), return_inverse=True)
+    smas = sma_matrix(close, windows)
+    fast_sma, slow_sma = smas[inverse[: len(fast)]], smas[inverse[len(fast) :]]
+    # NaN comparisons are False, so sets stay flat until both SMAs exist.
+    position = (fast_sma > slow_sma).astype(float)
+    returns = np.diff(close) / close[:-1]
+    trades = np.abs(np.diff(position, axis=1, prepend=0.0))[:, :-1]
+    daily = position[:, :-1] * returns - trades * cost
+    equity = capital * np.cumprod(1 + daily, axis=1)
+    stats = equity_stats(
+        np.column_stack((np.full(len(fast), capital), equity)), capital
+    )
+    stats["turnover"] = trades.sum(axis=1)
+    stats["trades"] = np.count_nonzero(trades, axis=1)
+    return stats
+
+
+def backtest_threshold_rebalance(
+    close: np.ndarray,
+    target: np.ndarray,
+    band: np.ndarray,
+    capital: float,
+    cost: float,
+) -> dict[str, np.ndarray]:
+    """Hold ``target`` weight in the stock, rebalancing when it drifts past ``band``.
+
+    Rebalancing is path-dependent, so this steps through days once while
+    updating every parameter set as a vector.
+    """
+    shares = target * capital / close[0]
+    cash = capital - shares * close[0] * (1 + cost)
+    turnover = target.copy()
+    trades = (target > 0).astype(np.int64)
+    equity = np.empty((len(target), len(close)))
+    for t, price in enumerate(close):
+        value = shares * price + cash
+        drift = np.abs(shares * price / value - target) > band + 1e-9
+        new_shares = np.where(drift, target * value / price, shares)
+        traded = np.abs(new_shares - shares) * price
+        cash -= (new_shares - shares) * price + traded * cost
+        shares = new_shares
+        turnover += traded / value
+        trades += drift
+        equity[:, t] = shares * price + cash
+    stats = equity_stats(equity, capital)
+    stats["turnover"] = turnover
+    stats["trades"] = trades
+    return stats
+
+
+def parse_parameter_sets(
+    strategy: str, parameter_sets: list[dict[str, float]], bars: int
+) -> tuple[np.ndarray, np.ndarray] | str:
+    """Validate parameter sets into two arrays, or return an error message.
+
+    Moving-average windows must be shorter than the ``bars`` tested, or the
+    slow average never has a bar left to trade on.
+    """
+    keys = ("fast", "slow") if strategy == "ma_crossover" else ("target", "band")
+    try:
+        a = np.array([float(p[keys[0]]) for p in parameter_sets])
+        b = np.array([float(p[keys[1]]) for p in parameter_sets])
+    except KeyError:
+        return f"Each parameter set for {strategy} needs '{keys[0]}' and '{keys[1]}'"
+    if not (np.isfinite(a).all() and np.isfinite(b).all()):
+        return f"'{keys[0]}' and '{keys[1]}' must be finite numbers"
+    if strategy == "ma_crossover":
+        if np.any(a != np.round(a)) or np.any(b != np.round(b)):
+            return "Windows must be whole numbers of days"
+        if np.any(a < 1) or np.any(a >= b):
+            return "Windows must satisfy 1 <= fast < slow"
+        if np.any(b >= bars):
+            return f"slow must be shorter than the {bars} days of history tested"
+        return a.astype(np.int64), b.astype(np.int64)
+    if np.any((a < 0) | (a > 1)) or np.any(b < 0):
+        return "target must be in [0, 1] and band must be non-negative"
+    return a, b
+
+
+@mcp.tool(
+    name="run_backtest",
+    description=(
+        "Backtest a rule-based strategy on a stock's daily history for one or "
+        "more parameter sets in a single call, returning P&L, drawdown and "
+        "turnover for each."
+    ),
+)
+def run_backtest(
+    symbol: Annotated[str, Field(description="Stock ticker symbol (e.g., AAPL, MSFT)")],
+    strategy: Annotated[
+        Literal["ma_crossover", "threshold_rebalance"],
+        Field(
+            description="'ma_crossover' (long when fast SMA > slow SMA) or "
+            "'threshold_rebalance' (hold a target weight, rebalance past a band)"
+        ),
+    ],
+    parameter_sets: Annotated[
+        list[dict[str, float]],
+        Field(
+            description="Parameter sets to evaluate, e.g. [{'fast': 10, 'slow': 50}] "
+            "for ma_crossover or [{'target': 0.6, 'band': 0.05}] for "
+            "threshold_rebalance",
+            min_length=1,
+            max_length=MAX_PARAMETER_SETS,
+        ),
+    ],
+    days: Annotated[
+        int, Field(description="Trading days of history to test", ge=30, le=5000)
+    ] = 756,
+    initial_capital: Annotated[
+        float, Field(description="Starting capital in USD", gt=0)
+    ] = 100_000.0,
+    cost_bps: Annotated[
+        float, Field(description="Transaction cost in basis points", ge=0, le=500)
+    ] = 5.0,
+) -> dict:
+    print(
+        f"[blue]invoking tool:run_backtest symbol={symbol}, strategy={strategy}[/blue]"
+    )
+
+    symbol = normalize_symbol(symbol)
+    if symbol not in TICK_STORE:
+        return symbol_not_found(symbol)
+
+    dates = history_dates(days)
+    parsed = parse_parameter_sets(strategy, parameter_sets, len(dates))
+    if isinstance(parsed, str):
+        return {"status": "rejected", "symbol": symbol, "reason": parsed}
+    first, second = parsed
+
+    close = generate_ohlcv(symbol, len(dates), previous_close(symbol))["close"]
+    cost = cost_bps / 10_000
+    if strategy == "ma_crossover":
+        stats = backtest_ma_crossover(close, first, second, initial_capital, cost)
+    else:
+        stats = backtest_threshold_rebalance(
+            close, first, second, initial_capital, cost
+        )
+
+    columns = {key: np.round(values, 2).tolist() for key, values in stats.items()}
+    results = [
+        {"params": params, **{key: columns[key][i] for key in columns}}
+        for i, params in enumerate(parameter_sets)
+    ]
+    buy_and_hold = (close[-1] / close[0] - 1) * 100
+
+    return {
+        "symbol": symbol,
+        "strategy": strategy,
+        "start_date": str(dates[0]),
+        "end_date": str(dates[-1]),
+        "days": len(dates),
+        "results": results,
+        "best": results[int(np.argmax(stats["pnl"]))]["params"],
+        "buy_and_hold_return_percent": round(float(buy_and_hold), 2),
+    }
+
+
+# Option pricing
+OPTION_RISK_FREE_RATE = 0.045
+OPTION_EXPIRY_DAYS = [7, 14, 30, 60, 90, 180, 365]
+MAX_OPTION_EXPIRIES = 24
+MAX_OPTION_STRIKES = 201
+VOLATILITY_LOOKBACK_DAYS = 63
+
+
+def norm_cdf(x: np.ndarray) -> np.ndarray:
+    """Standard normal CDF (Abramowitz & Stegun 26.2.17, error < 7.5e-8)."""
+    t = 1.0 / (1.0 + 0.2316419 * np.abs(x))
+    poly = t * (
+        0.319381530
+        + t * (-0.356563782 + t * (1.781477937 + t * (-1.821255978 + t * 1.330274429)))
+    )
+    upper_tail = norm_pdf(x) * poly
+    return np.where(x >= 0, 1.0 - upper_tail, upper_tail)
+
+
+def norm_pdf(x: np.ndarray) -> np.ndarray:
+    return np.exp(-0.5 * x * x) / np.sqrt(2 * np.pi)
+
+
+def black_scholes(
+    spot: float,
+    strikes: np.ndarray,
+    years: np.ndarray,
+    volatility: float,
+    rate: float,
+    dividend_yield: float,
+) -> dict[str, np.ndarray]:
+    """Black-Scholes prices and greeks for every (expiry, strike) pair.
+
+    ``years`` is a column and ``strikes`` a row, so each result is an
+    (expiries, strikes) grid computed in one broadcast. Vega is per volatility
+    point and theta per calendar day.
+    """
+    sqrt_t = np.sqrt(years)
+    sd = volatility * sqrt_t
+    d1 = (
+        np.log(spot / strikes) + (rate - dividend_yield + volatility**2 / 2) * years
+    ) / sd
+    d2 = d1 - sd
+    spot_disc = spot * np.exp(-dividend_yield * years)
+    strike_disc = strikes * np.exp(-rate * years)
+    n_d1, n_d2 = norm_cdf(d1), norm_cdf(d2)
+    pdf_d1 = norm_pdf(d1)
+    decay = -spot_disc * pdf_d1 * volatility / (2 * sqrt_t)
+    return {
+        "call_price": spot_disc * n_d1 - strike_disc * n_d2,
+        "put_price": strike_disc * (1 - n_d2) - spot_disc * (1 - n_d1),
+        "call_delta": np.exp(-dividend_yield * years) * n_d1,
+        "put_delta": -np.exp(-dividend_yield * years) * (1 - n_d1),
+        "gamma": spot_disc * pdf_d1 / (spot * spot * sd),
+        "vega": spot_disc * pdf_d1 * sqrt_t / 100,
+        "call_theta": (
+            decay - rate * strike_disc * n_d2 + dividend_yield * spot_disc * n_d1
+        )
+        / 365,
+        "put_theta": (
+            decay
+            + rate * strike_disc * (1 - n_d2)
+            - dividend_yield * spot_disc * (1 - n_d1)
+        )
+        / 365,
+    }
+
+
+def strike_ladder(spot: float, count: int, step_percent: float) -> np.ndarray:
+    """``count`` strikes centred on ``spot``, snapped to a listed-style increment."""
+    increment = 0.5 if spot < 25 else 1.0 if spot < 200 else 5.0
+    offsets = np.arange(count) - count // 2
+    raw = spot * (1 + offsets * step_percent / 100)
+    strikes = np.unique(np.round(raw / increment) * increment)
+    return strikes[strikes > 0]
+
+
+def historical_volatility(symbol: str, days: int = VOLATILITY_LOOKBACK_DAYS) -> float:
+    """Annualized standard deviation of the symbol's recent daily log returns."""
+    returns = return_matrix([symbol], days)[:, 0]
+    return float(returns.std(ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR))
+
+
+@mcp.tool(
+    name="get_option_chain",
+    description=(
+        "Price a grid of European calls and puts on a stock with Black-Scholes, "
+        "returning price, delta, gamma, vega (per vol point) and theta (per day) "
+        "for every strike and expiry."
+    ),
+)
+def get_option_chain(
+    symbol: Annotated[str, Field(description="Stock ticker symbol (e.g., AAPL, MSFT)")],
+    expiry_days: Annotated[
+        list[int],
+        Field(
+            description="Days to expiry for each expiration, e.g. [30, 60, 90]",
+            min_length=1,
+            max_length=MAX_OPTION_EXPIRIES,
+        ),
+    ] = OPTION_EXPIRY_DAYS,
+    strikes: Annotated[
+        list[float] | None,
+        Field(
+            description="Explicit strikes; defaults to a ladder around the price",
+            max_length=MAX_OPTION_STRIKES,
+        ),
+    ] = None,
+    strike_count: Annotated[
+        int,
+        Field(
+            description="Number of ladder strikes when strikes are not given",
+            ge=1,
+            le=MAX_OPTION_STRIKES,
+        ),
+    ] = 21,
+    strike_step_percent: Annotated[
+        float,
+        Field(description="Spacing of ladder strikes, in percent", gt=0, le=50),
+    ] = 2.5,
+    volatility: Annotated[
+        float | None,
+        Field(
+            description="Annualized volatility; defaults to the historical volatility",
+            gt=0,
+            le=5,
+        ),
+    ] = None,
+    risk_free_rate: Annotated[
+        float, Field(description="Annualized risk-free rate", ge=-0.05, le=0.5)
+    ] = OPTION_RISK_FREE_RATE,
+    format: Annotated[
+        Literal["rows", "columns"],
+        Field(
+            description="Response shape: 'rows' (one dict per contract) or "
+            "'columns' (one list per field, compact for large chains)"
+        ),
+    ] = "rows",
+) -> dict:
+    print(f"[blue]invoking tool:get_option_chain symbol={symbol}[/blue]")
+
+    symbol = normalize_symbol(symbol)
+    if symbol not in TICK_STORE:
+        return symbol_not_found(symbol)
+
+    if any(not 1 <= d <= 3650 for d in expiry_days):
+        return {
+            "status": "rejected",
+            "symbol": symbol,
+            "reason": "Expiry days must be between 1 and 3650",
+        }
+    if strikes is not None and (not strikes or min(strikes) <= 0):
+        return {
+            "status": "rejected",
+            "symbol": symbol,
+            "reason": "Strikes must be positive",
+        }
+
+    idx = TICK_STORE.index_of(symbol)
+    snap = TICK_STORE.snapshot()
+    spot = float(snap.prices[idx])
+    if strikes is None:
+        strike_grid = strike_ladder(spot, strike_count, strike_step_percent)
+    else:
+        strike_grid = np.unique(np.array(strikes, dtype=float))
+    expiries = np.unique(np.array(expiry_days))
+    sigma = volatility if volatility is not None else historical_volatility(symbol)
+    dividend_yield = FUNDAMENTALS.get(symbol)["dividend_yield"] / 100
+
+    greeks = black_scholes(
+        spot,
+        strike_grid,
+        expiries[:, None] / 365,
+        sigma,
+        risk_free_rate,
+        dividend_yield,
+    )
+
+    today = datetime.now(ZoneInfo(NYSE_CALENDAR.timezone)).date()
+    expirations = (np.datetime64(today, "D") + expiries).astype(str)
+    shape = (len(expiries), len(strike_grid))
+    columns = {
+        "expiration": np.broadcast_to(expirations[:, None], shape).ravel().tolist(),
+        "days_to_expiry": np.broadcast_to(expiries[:, None], shape).ravel().tolist(),
+        "strike": np.broadcast_to(strike_grid, shape).ravel().tolist(),
+    }
+    for key, values in greeks.items():
+        decimals = 2 if key.endswith("price") else 4
+        columns[key] = np.round(values, decimals).ravel().tolist()
+
+    result = {
+        "symbol": symbol,
+        "underlying_price": round(spot, 2),
+        "volatility": round(sigma, 4),
+        "risk_free_rate": risk_free_rate,
+        "dividend_yield": round(dividend_yield, 4),
+        "expirations": len(expiries),
+        "strikes": len(strike_grid),
+        "contracts": 2 * len(expiries) * len(strike_grid),
+        "tick": snap.tick,
+        "timestamp": snap.timestamp.isoformat(),
+    }
+    if format == "columns":
+        result["columns"] = columns
+    else:
+        keys = tuple(columns)
+        result["chain"] = [dict(zip(keys, row)) for row in zip(*columns.values())]
+
+    return result
+
+
 @mcp.tool(
     name="add_to_watchlist",
     description="Add a stock to your watchlist.",
@@ -317,16 +3019,24 @@ def add_to_watchlist(
     notes: Annotated[
         str | None, Field(description="Optional notes about this stock")
     ] = None,
+    watchlist: WatchlistName = DEFAULT_WATCHLIST,
 ) -> dict:
     print(f"[green]invoking tool:add_to_watchlist symbol={symbol}[/green]")
 
+    symbol = normalize_symbol(symbol)
+    if symbol not in TICK_STORE:
+        return symbol_not_found(symbol)
+
+    entry, added = WATCHLISTS.add(watchlist, symbol, notes or "")
+
     return {
-        "status": "added",
+        "status": "added" if added else "already_watching",
         "symbol": symbol,
-        "notes": notes or "",
+        "notes": entry.notes,
         "current_price": get_mock_price(symbol),
-        "added_at": datetime.now(timezone.utc).isoformat(),
-        "watchlist_id": f"WL-{random.randint(1000, 9999)}",
+        "added_at": entry.added_at.isoformat(),
+        "watchlist_name": watchlist,
+        "watchlist_id": watchlist_id(watchlist),
     }
 
 
@@ -336,13 +3046,19 @@ def add_to_watchlist(
 )
 def remove_from_watchlist(
     symbol: Annotated[str, Field(description="Stock ticker symbol to remove")],
+    watchlist: WatchlistName = DEFAULT_WATCHLIST,
 ) -> dict:
     print(f"[red]invoking tool:remove_from_watchlist symbol={symbol}[/red]")
 
+    symbol = normalize_symbol(symbol)
+
+    removed = WATCHLISTS.remove(watchlist, symbol)
+
     return {
-        "status": "removed",
+        "status": "removed" if removed else "not_found",
         "symbol": symbol,
-        "removed_at": datetime.now(timezone.utc).isoformat(),
+        "removed_at": datetime.now(timezone.utc).isoformat() if removed else None,
+        "watchlist_name": watchlist,
     }
 
 
@@ -350,32 +3066,38 @@ def remove_from_watchlist(
     name="get_watchlist",
     description="Get all stocks in your watchlist.",
 )
-def get_watchlist() -> dict:
+def get_watchlist(watchlist: WatchlistName = DEFAULT_WATCHLIST) -> dict:
     print("[cyan]invoking tool:get_watchlist[/cyan]")
 
-    watched_stocks = random.sample(list(STOCK_DATA.keys()), k=3)
-    watchlist = []
-
-    for symbol in watched_stocks:
-        price = get_mock_price(symbol)
-        prev_price = price * random.uniform(0.97, 1.03)
-        change_pct = ((price - prev_price) / prev_price) * 100
-
-        watchlist.append(
-            {
-                "symbol": symbol,
-                "name": STOCK_DATA[symbol]["name"],
-                "current_price": price,
-                "change_percent": round(change_pct, 2),
-                "added_at": (
-                    datetime.now(timezone.utc) - timedelta(days=random.randint(1, 30))
-                ).isoformat(),
-            }
+    entries = WATCHLISTS.entries(watchlist)
+    symbols = [symbol for symbol, _ in entries]
+    idx = symbol_indices(symbols)
+    snap = TICK_STORE.snapshot()
+    prices = snap.prices[idx]
+    previous = snap.previous_close[idx]
+    change_pct = (prices - previous) / previous * 100
+
+    rows = [
+        {
+            "symbol": symbol,
+            "name": STOCK_DATA.get(symbol, {}).get("name", symbol),
+            "current_price": price,
+            "change_percent": pct,
+            "notes": entry.notes,
+            "added_at": entry.added_at.isoformat(),
+        }
+        for (symbol, entry), price, pct in zip(
+            entries,
+            np.round(prices, 2).tolist(),
+            np.round(change_pct, 2).tolist(),
         )
+    ]
 
     return {
-        "watchlist": watchlist,
-        "total": len(watchlist),
+        "watchlist": rows,
+        "total": len(rows),
+        "watchlist_name": watchlist,
+        "watchlist_id": watchlist_id(watchlist),
     }
 
 
@@ -387,19 +3109,18 @@ def get_market_status() -> dict:
     print("[yellow]invoking tool:get_market_status[/yellow]")
 
     now = datetime.now(timezone.utc)
-    hour = now.hour
-
-    # US market hours: 9:30 AM - 4:00 PM EST (14:30 - 21:00 UTC)
-    is_open = 14 <= hour < 21 and now.weekday() < 5
+    local_today = now.astimezone(ZoneInfo(NYSE_CALENDAR.timezone)).date()
+    next_open = NYSE_CALENDAR.next_open(now)
+    next_close = NYSE_CALENDAR.next_close(now)
 
     return {
         "market": "NYSE",
-        "status": "open" if is_open else "closed",
-        "next_open": "2026-01-22T14:30:00Z",
-        "next_close": "2026-01-21T21:00:00Z",
-        "timezone": "America/New_York",
+        "status": "open" if NYSE_CALENDAR.is_open(now) else "closed",
+        "next_open": next_open.isoformat() if next_open else None,
+        "next_close": next_close.isoformat() if next_close else None,
+        "timezone": NYSE_CALENDAR.timezone,
         "current_time": now.isoformat(),
-        "is_trading_day": now.weekday() < 5,
+        "is_trading_day": NYSE_CALENDAR.is_trading_day(local_today),
     }
 
 
@@ -412,10 +3133,24 @@ def cancel_order(
 ) -> dict:
     print(f"[red]invoking tool:cancel_order order_id={order_id}[/red]")
 
+    order = ORDER_BOOK.cancel(order_id)
+    if order is None:
+        return {
+            "status": "not_found",
+            "order_id": order_id,
+            "message": "No order with this ID",
+        }
+    if order.status != "cancelled":
+        return {
+            "status": order.status,
+            "order_id": order_id,
+            "message": f"Order is {order.status} and can no longer be cancelled",
+        }
+
     return {
         "status": "cancelled",
         "order_id": order_id,
-        "cancelled_at": datetime.now(timezone.utc).isoformat(),
+        "cancelled_at": order.updated_at.isoformat(),
         "message": "Order successfully cancelled",
     }
 
@@ -429,23 +3164,14 @@ def get_order_status(
 ) -> dict:
     print(f"[cyan]invoking tool:get_order_status order_id={order_id}[/cyan]")
 
-    status = random.choice(["executed", "pending", "partially_filled", "cancelled"])
-
-    return {
-        "order_id": order_id,
-        "status": status,
-        "symbol": random.choice(list(STOCK_DATA.keys())),
-        "order_type": "market",
-        "side": random.choice(["buy", "sell"]),
-        "quantity": random.randint(10, 100),
-        "filled_quantity": random.randint(0, 100),
-        "price": get_mock_price("AAPL"),
-        "created_at": (datetime.now(timezone.utc) - timedelta(hours=2)).isoformat(),
-        "updated_at": datetime.now(timezone.utc).isoformat(),
-    }
+    order = ORDER_BOOK.get(order_id)
+    if order is None:
+        return {"order_id": order_id, "status": "not_found"}
+    return order.to_dict()
 
 
 if __name__ == "__main__":
     host = os.getenv("MCP_HOST", "0.0.0.0")
     port = int(os.getenv("MCP_PORT", "10000"))
+    TICK_STORE.start()
     mcp.run(transport="http", host=host, port=port)
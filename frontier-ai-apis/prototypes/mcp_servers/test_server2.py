@@ -0,0 +1,112 @@
+"""Regression tests for the server2 catalog import.
+
+Run with ``python -m pytest test_server2.py`` from this directory.
+"""
+
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import server2
+from server2 import (
+    CATALOG,
+    LoanLedger,
+    MemberTable,
+    import_books,
+    import_records,
+    read_records,
+    search_books,
+)
+
+
+def test_import_with_nothing_new_to_index(tmp_path):
+    empty = tmp_path / "empty.csv"
+    empty.write_text("title,author,isbn,year\n")
+    assert import_records(read_records(str(empty))).read == 0
+
+    books = tmp_path / "books.csv"
+    books.write_text("title,author,isbn,year\nDune,Frank Herbert,978-0441172719,1965\n")
+    assert import_records(read_records(str(books))).imported == 1
+    again = import_records(read_records(str(books)))
+    assert (again.imported, again.duplicates) == (0, 1)
+
+
+def test_import_keeps_rows_read_before_an_error(tmp_path):
+    rows = tmp_path / "rows.jsonl"
+    rows.write_text(
+        json.dumps({"title": "Emma", "author": "Jane Austen", "isbn": "978-0141439587"})
+        + "\n[1, 2]\n{not json\n"
+    )
+    with pytest.raises(json.JSONDecodeError):
+        import_records(read_records(str(rows)))
+    assert CATALOG.get_by_isbn("978-0141439587") is not None
+    hits, _ = CATALOG.search("emma", 5)
+    assert [book.isbn for book, _ in hits] == ["978-0141439587"]
+
+
+def test_author_query_uses_the_author_index():
+    for isbn, title in [
+        ("978-0141439518", "Pride and Prejudice"),
+        ("978-0141439662", "Sense and Sensibility"),
+    ]:
+        CATALOG.add(title, "Jane Austen", isbn, 1811)
+    page = search_books("  jane   AUSTEN ", 10, None)
+    titles = [hit["title"] for hit in page["results"]]
+    assert {"Pride and Prejudice", "Sense and Sensibility"} <= set(titles)
+    assert titles == sorted(titles)
+    assert page["total"] == len(titles)
+    assert all(hit["score"] is None for hit in page["results"])
+
+    # Author pages honour limit and continue through next_cursor.
+    for i in range(30):
+        CATALOG.add(f"Volume {i:02d}", "Prolific Writer", f"PW-{i:02d}", 2000)
+    seen = []
+    cursor = None
+    while True:
+        page = search_books("Prolific Writer", 7, cursor)
+        assert page["total"] == 30
+        assert len(page["results"]) <= 7
+        seen += [hit["title"] for hit in page["results"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [f"Volume {i:02d}" for i in range(30)]
+
+
+def test_import_tool_only_reads_the_import_directory(tmp_path, monkeypatch):
+    root = tmp_path / "imports"
+    root.mkdir()
+    monkeypatch.setattr(server2, "BOOK_IMPORT_DIR", str(root))
+    (root / "ok.csv").write_text(
+        "title,author,isbn,year\nMiddlemarch,George Eliot,978-0141439549,1871\n"
+    )
+    outside = tmp_path / "secret.csv"
+    outside.write_text("title,author,isbn,year\n")
+    (root / "link.csv").symlink_to(outside)
+
+    for path in ("/etc/passwd", "../secret.csv", str(outside), "link.csv"):
+        assert asyncio.run(import_books(path))["status"] == "rejected"
+    assert asyncio.run(import_books("missing.csv"))["status"] == "not_found"
+    done = asyncio.run(import_books("ok.csv"))
+    assert (done["status"], done["imported"]) == ("imported", 1)
+
+
+def test_overdue_listing_is_bounded_and_fees_are_a_running_total():
+    members = MemberTable()
+    loans = LoanLedger(members)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    member = members.register("Reader", "reader@example.com")
+    for i in range(5):
+        loans.checkout(f"book_{i}", member, due_days=14 + i, now=start)
+
+    # Due dates fall on days 14-18, so on day 20 the loans are 6..2 days late.
+    listed, count, fees = loans.overdue(2, now=start + timedelta(days=20))
+    assert [loan.book_id for loan in listed] == ["book_0", "book_1"]
+    assert count == 5
+    assert fees == 0.5 * (6 + 5 + 4 + 3 + 2)
+
+    loans.checkin("book_0", member, now=start + timedelta(days=20))
+    listed, count, fees = loans.overdue(10, now=start + timedelta(days=20))
+    assert (len(listed), count, fees) == (4, 4, 0.5 * (5 + 4 + 3 + 2))
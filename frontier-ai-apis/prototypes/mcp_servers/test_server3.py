@@ -0,0 +1,280 @@
+"""Regression tests for the server3 order book and portfolio ledger.
+
+Run with ``python -m pytest test_server3.py`` from this directory.
+"""
+
+import asyncio
+import dataclasses
+import os
+from datetime import datetime, timezone
+
+os.environ["PORTFOLIO_DB"] = ":memory:"
+
+import fastmcp  # noqa: E402
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+
+from server3 import (  # noqa: E402
+    LEDGER,
+    ORDER_BOOK,
+    OrderBook,
+    PortfolioLedger,
+    SIM_TICKS_PER_SESSION,
+    TICK_STORE,
+    PriceTickStore,
+    get_stock_history,
+    get_stock_price,
+    get_stock_prices,
+    mcp,
+    parse_parameter_sets,
+    place_order,
+    stream_prices_sse,
+)
+
+
+def cross_prices(symbol: str, factor: float) -> None:
+    """Feed the order book one tick with ``symbol`` scaled by ``factor``."""
+    snap = TICK_STORE.snapshot()
+    prices = snap.prices.copy()
+    prices[TICK_STORE.index_of(symbol)] *= factor
+    ORDER_BOOK.on_tick(dataclasses.replace(snap, prices=prices))
+
+
+def test_resting_sell_reserves_its_shares():
+    held = LEDGER.positions["AAPL"].quantity
+    price = float(TICK_STORE.snapshot().prices[TICK_STORE.index_of("AAPL")])
+
+    limit = place_order("AAPL", "sell", 10, "limit", round(price * 1.5, 2), None)
+    assert limit["status"] == "pending"
+    # The resting limit holds 10 shares, so selling everything is refused.
+    oversell = place_order("AAPL", "sell", held, "market", None, None)
+    assert oversell["status"] == "rejected"
+    sold = place_order("AAPL", "sell", held - 10, "market", None, None)
+    assert sold["status"] == "executed"
+
+    cross_prices("AAPL", 2.0)
+    order = ORDER_BOOK.get(limit["order_id"])
+    assert order.status == "executed"
+    assert order.filled_quantity == 10
+    assert "AAPL" not in LEDGER.positions
+    assert "AAPL" not in LEDGER.reserved
+
+
+def test_uncovered_sell_is_rejected_at_fill_time():
+    held = LEDGER.positions["MSFT"].quantity
+    price = float(TICK_STORE.snapshot().prices[TICK_STORE.index_of("MSFT")])
+    limit = place_order("MSFT", "sell", held, "limit", round(price * 1.5, 2), None)
+    trades = LEDGER.trade_count
+
+    # Shares leave the ledger without going through the order book.
+    LEDGER.record_trade(
+        "ADJ-MSFT", "MSFT", "sell", held, price, 0.0, datetime.now(timezone.utc)
+    )
+    cross_prices("MSFT", 2.0)
+
+    order = ORDER_BOOK.get(limit["order_id"])
+    assert order.status == "rejected"
+    assert order.filled_quantity == 0
+    assert "holding 0" in order.reason
+    assert LEDGER.trade_count == trades + 1
+    assert "MSFT" not in LEDGER.reserved
+
+
+def test_session_close_rolls_the_day_over():
+    store = PriceTickStore(seed=7, capacity=4)
+    store.register_many({"AAA": 100.0, "BBB": 50.0})
+
+    store.advance(SIM_TICKS_PER_SESSION - 1)
+    open_day = store.snapshot()
+    assert open_day.previous_close.tolist() == [100.0, 50.0]
+    assert (open_day.volume > 0).all()
+
+    store.advance(SIM_TICKS_PER_SESSION)
+    closed = store.snapshot()
+    assert np.array_equal(closed.previous_close, closed.prices)
+    assert np.array_equal(closed.day_high, closed.prices)
+    assert np.array_equal(closed.day_low, closed.prices)
+    assert not closed.volume.any()
+    # The snapshot published before the close keeps its own session's close.
+    assert open_day.previous_close.tolist() == [100.0, 50.0]
+
+    # A catch-up that skips over the next close still rolls the day over.
+    close = closed.previous_close.copy()
+    store.advance(2 * SIM_TICKS_PER_SESSION + 5)
+    caught_up = store.snapshot()
+    assert not np.array_equal(caught_up.previous_close, close)
+    assert (caught_up.volume > 0).all()
+
+
+def test_snapshot_arrays_are_read_only():
+    snap = TICK_STORE.snapshot()
+    for values in (snap.prices, snap.previous_close, snap.volume):
+        with pytest.raises(ValueError):
+            values[0] = 0
+
+
+@pytest.mark.parametrize("interval", ["nan", "inf", "-inf", "0", "61"])
+def test_price_stream_rejects_bad_intervals(interval):
+    query = f"symbols=AAPL&interval={interval}".encode()
+    request = Request({"type": "http", "query_string": query, "headers": []})
+    response = asyncio.run(stream_prices_sse(request))
+    assert response.status_code == 400
+
+
+def test_backtest_windows_must_be_whole_days():
+    reason = parse_parameter_sets("ma_crossover", [{"fast": 2.5, "slow": 10}], 100)
+    assert reason == "Windows must be whole numbers of days"
+    assert isinstance(
+        parse_parameter_sets(
+            "threshold_rebalance", [{"target": 0.5, "band": "nan"}], 100
+        ),
+        str,
+    )
+    fast, slow = parse_parameter_sets("ma_crossover", [{"fast": 5.0, "slow": 20}], 100)
+    assert fast.tolist() == [5] and slow.tolist() == [20]
+    # Huge windows are refused before the integer conversion can overflow.
+    huge = parse_parameter_sets("ma_crossover", [{"fast": 5, "slow": 1e20}], 100)
+    assert huge == "slow must be shorter than the 100 days of history tested"
+    assert isinstance(
+        parse_parameter_sets("ma_crossover", [{"fast": 5, "slow": 100}], 100), str
+    )
+    assert parse_parameter_sets("ma_crossover", [{"fast": 5, "slow": 99}], 100)
+
+
+def test_merged_history_reports_its_bar_width():
+    daily = get_stock_history("AAPL", 30, "columns", "day", 500)
+    assert (daily["interval"], daily["intervals_per_bar"]) == ("day", 1)
+
+    merged = get_stock_history("AAPL", 3650, "columns", "day", 500)
+    sessions = merged["period_days"]
+    assert merged["points"] <= 500
+    assert merged["intervals_per_bar"] == -(-sessions // 500) > 1
+
+
+def test_order_ids_continue_from_the_ledger(tmp_path):
+    path = str(tmp_path / "ledger.db")
+    store = PriceTickStore(seed=3, capacity=4)
+    store.register("AAA", 10.0)
+    now = datetime.now(timezone.utc)
+    PortfolioLedger(path).record_trade("ORD-00000041", "AAA", "buy", 1, 10.0, 0, now)
+
+    # A restarted process must not hand out ids already in the trade history.
+    book = OrderBook(store)
+    book.resume_ids(PortfolioLedger(path).last_order_number())
+    assert book.submit("AAA", "buy", "market", 1).order_id == "ORD-00000042"
+
+
+def test_watchlist_round_trip_through_a_client():
+    async def call(client: fastmcp.Client, tool: str, **arguments) -> dict:
+        return (await client.call_tool(tool, arguments)).structured_content
+
+    async def round_trip() -> None:
+        async with fastmcp.Client(mcp) as client:
+            added = await call(
+                client, "add_to_watchlist", symbol="AAPL", watchlist="rt"
+            )
+            assert added["status"] == "added"
+            listed = await call(client, "get_watchlist", watchlist="rt")
+            assert [row["symbol"] for row in listed["watchlist"]] == ["AAPL"]
+            assert listed["watchlist_id"] == added["watchlist_id"]
+            assert (await call(client, "get_watchlist"))["watchlist_name"] == "default"
+        # A new client, and so a new MCP session, sees the same named list.
+        async with fastmcp.Client(mcp) as client:
+            removed = await call(
+                client, "remove_from_watchlist", symbol="AAPL", watchlist="rt"
+            )
+            assert removed["status"] == "removed"
+            assert (await call(client, "get_watchlist", watchlist="rt"))["total"] == 0
+
+    asyncio.run(round_trip())
+
+
+def test_resting_buys_cannot_spend_the_same_cash():
+    price = float(TICK_STORE.snapshot().prices[TICK_STORE.index_of("NVDA")])
+    limit = round(price * 0.9, 2)
+    free = LEDGER.cash - LEDGER.reserved_cash
+    quantity = int(free // (limit * 1.01))
+
+    first = place_order("NVDA", "buy", quantity, "limit", limit, None)
+    assert first["status"] == "pending"
+    for _ in range(2):
+        again = place_order("NVDA", "buy", quantity, "limit", limit, None)
+        assert again["status"] == "rejected"
+        assert "reserved by open buy orders" in again["reason"]
+
+    cross_prices("NVDA", 0.5)
+    assert ORDER_BOOK.get(first["order_id"]).status == "executed"
+    assert LEDGER.cash >= 0
+    assert LEDGER.reserved_cash == 0
+
+
+def test_buy_is_rejected_at_fill_time_when_cash_is_gone():
+    price = float(TICK_STORE.snapshot().prices[TICK_STORE.index_of("JPM")])
+    stop = round(price * 1.1, 2)
+    order = place_order("JPM", "buy", 1, "stop", None, stop)
+    assert order["status"] == "pending"
+
+    # Cash leaves the ledger without going through the order book.
+    cash, LEDGER.cash = LEDGER.cash, 0.0
+    cross_prices("JPM", 1.2)
+    LEDGER.cash = cash
+
+    resting = ORDER_BOOK.get(order["order_id"])
+    assert resting.status == "rejected"
+    assert "Cash no longer covers" in resting.reason
+    assert LEDGER.reserved_cash == 0
+    assert place_order("JPM", "buy", 1, "limit", -5.0, None)["status"] == "rejected"
+
+
+def test_orders_on_symbols_newer_than_the_snapshot_wait_a_tick():
+    old = TICK_STORE.snapshot()
+    TICK_STORE.register("LATECO", 20.0)
+    order = place_order("LATECO", "buy", 1, "limit", 15.0, None)
+    assert order["status"] == "pending"
+    ORDER_BOOK.on_tick(old)
+    assert ORDER_BOOK.get(order["order_id"]).status == "pending"
+
+
+def test_failing_listener_does_not_stop_the_tick():
+    store = PriceTickStore(seed=5, capacity=4)
+    store.register("AAA", 10.0)
+    seen = []
+
+    def broken(snapshot):
+        raise RuntimeError("listener bug")
+
+    store.add_listener(broken)
+    store.add_listener(lambda snapshot: seen.append(snapshot.tick))
+    store.advance(1)
+    store.advance(2)
+    assert seen == [1, 2]
+
+
+def test_symbols_are_normalized_and_unknown_tickers_not_registered():
+    assert get_stock_price(" aapl ")["price"] == get_stock_price("AAPL")["price"]
+    registered = len(TICK_STORE.symbols)
+    assert get_stock_price("NOPE123")["status"] == "not_found"
+    missing = get_stock_prices(["msft", "NOPE123", "nope456"])
+    assert missing == {
+        "status": "not_found",
+        "symbols": ["NOPE123", "NOPE456"],
+        "reason": "Unknown tickers",
+    }
+    assert place_order("nope123", "buy", 1, "market", None, None)["status"] == (
+        "not_found"
+    )
+    assert len(TICK_STORE.symbols) == registered
+
+
+def test_model_parameters_do_not_depend_on_registration_order():
+    together = PriceTickStore(seed=11, capacity=4)
+    together.register_many({"AAA": 10.0, "BBB": 20.0})
+    apart = PriceTickStore(seed=11, capacity=4)
+    apart.register("BBB", 20.0)
+    apart.advance(5)
+    apart.register("AAA", 10.0)
+    for symbol in ("AAA", "BBB"):
+        assert together._vol[together.index_of(symbol)] == (
+            apart._vol[apart.index_of(symbol)]
+        )